@@ -0,0 +1,100 @@
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+
+from recipes.models import Recipe
+
+User = get_user_model()
+
+
+def measure(func, repeat=1):
+    """
+    Замеряет время выполнения и пиковое потребление памяти функцией.
+
+    Функция вызывается repeat раз, возвращается лучшее время. Память
+    отслеживается tracemalloc в отдельном запуске, чтобы не замедлять
+    замеры времени; учитываются только объекты Python.
+
+    Args:
+        func: Функция без аргументов.
+        repeat (int): Количество запусков.
+
+    Returns:
+        tuple[float, int]: Время в секундах и пик памяти в байтах.
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return min(timings), peak
+
+
+@contextmanager
+def rolled_back():
+    """
+    Выполняет блок в транзакции, которая затем откатывается.
+
+    Синтетические данные замеров не остаются в базе данных.
+    """
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def create_author():
+    """
+    Создает автора синтетических рецептов.
+    """
+    return User.objects.create_user(
+        username='benchmark', email='benchmark@example.com',
+        first_name='Benchmark', last_name='Benchmark'
+    )
+
+
+def create_recipes(author, contents, batch_size=5000):
+    """
+    Создает синтетические рецепты запросами bulk_create.
+
+    Сигналы сохранения при этом не отправляются, поэтому версии данных
+    и производные столбцы вызывающий код обновляет сам.
+
+    Args:
+        author: Автор рецептов.
+        contents: Пары (название, описание) рецептов.
+        batch_size (int): Количество рецептов в одном запросе.
+
+    Returns:
+        list[int]: Идентификаторы созданных рецептов.
+    """
+    recipes = Recipe.objects.bulk_create(
+        (Recipe(author=author, name=name, text=text, cooking_time=10,
+                image='recipes/benchmark.png')
+         for name, text in contents),
+        batch_size=batch_size
+    )
+    return [recipe.pk for recipe in recipes]
+
+
+def analyze(*models):
+    """
+    Обновляет статистику планировщика PostgreSQL по таблицам моделей.
+
+    Без этого планы запросов сразу после массовой вставки не отражают
+    реальный объем данных.
+    """
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for model in models:
+            table = connection.ops.quote_name(model._meta.db_table)
+            cursor.execute(f'ANALYZE {table}')
@@ -0,0 +1,126 @@
+from contextlib import contextmanager
+from threading import local
+
+from django.conf import settings
+from django.core.cache import cache
+
+from recipes.models import ShoppingCart
+from .versions import bump_versions, get_version
+
+HITS_KEY = 'shopping_list:hits'
+MISSES_KEY = 'shopping_list:misses'
+
+_state = local()
+
+
+def cart_version_name(user_id):
+    """
+    Возвращает имя версии корзины покупок пользователя.
+    """
+    return f'shopping_cart:{user_id}'
+
+
+def bump_cart_versions(user_ids):
+    """
+    Сбрасывает закешированные списки покупок пользователей.
+
+    Args:
+        user_ids: Идентификаторы пользователей, чьи корзины изменились.
+    """
+    bump_versions(cart_version_name(user_id) for user_id in set(user_ids))
+
+
+def bump_recipe_cart_versions(recipe_id):
+    """
+    Сбрасывает списки покупок пользователей, в корзине которых есть рецепт.
+
+    Внутри recipe_cart_invalidation() вызов откладывается до выхода
+    из блока.
+
+    Args:
+        recipe_id: Идентификатор рецепта, ингредиенты которого изменились.
+    """
+    pending = getattr(_state, 'recipe_ids', None)
+    if pending is not None:
+        pending.add(recipe_id)
+        return
+    bump_cart_versions(ShoppingCart.objects.filter(
+        recipe_id=recipe_id
+    ).values_list('user_id', flat=True))
+
+
+@contextmanager
+def recipe_cart_invalidation():
+    """
+    Объединяет сброс списков покупок при массовом изменении ингредиентов.
+
+    Сигналы отдельных строк внутри блока только запоминают рецепт,
+    а списки покупок сбрасываются один раз при выходе из блока.
+    """
+    if getattr(_state, 'recipe_ids', None) is not None:
+        yield
+        return
+    _state.recipe_ids = set()
+    try:
+        yield
+    finally:
+        recipe_ids, _state.recipe_ids = _state.recipe_ids, None
+    if recipe_ids:
+        bump_cart_versions(ShoppingCart.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('user_id', flat=True))
+
+
+def _count(key):
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+def get_stats():
+    """
+    Возвращает счетчики попаданий и промахов кеша списков покупок.
+
+    Returns:
+        dict: Количество попаданий и промахов.
+    """
+    return {'hits': cache.get(HITS_KEY, 0),
+            'misses': cache.get(MISSES_KEY, 0)}
+
+
+def _store(key, chunks):
+    """
+    Отдает части документа и сохраняет его в кеш после полной отдачи.
+    """
+    document = []
+    for chunk in chunks:
+        document.append(chunk)
+        yield chunk
+    cache.set(key, b''.join(document), settings.SHOPPING_LIST_CACHE_TIMEOUT)
+
+
+def get_shopping_list_document(user, renderer, render):
+    """
+    Возвращает документ со списком покупок из кеша или формирует его.
+
+    Ключ кеша включает версию корзины, поэтому после изменения корзины
+    документ формируется заново.
+
+    Args:
+        user: Пользователь, для которого формируется список.
+        renderer: Рендерер выбранного формата.
+        render: Функция, возвращающая части документа при промахе.
+
+    Returns:
+        tuple: Итерируемые части документа и признак попадания в кеш.
+    """
+    version = get_version(cart_version_name(user.pk))
+    key = f'shopping_list:{user.pk}:{version}:{renderer.format}'
+    document = cache.get(key)
+    if document is not None:
+        _count(HITS_KEY)
+        return (document,), True
+    _count(MISSES_KEY)
+    return _store(key, render()), False
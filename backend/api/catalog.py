@@ -0,0 +1,164 @@
+from bisect import bisect_left
+from threading import Lock
+
+from rest_framework.renderers import JSONRenderer
+
+from recipes.models import Ingredient, Tag
+from .serializers import IngredientSerializer, TagSerializer
+from .versions import get_version
+
+INGREDIENTS_VERSION = 'ingredients'
+TAGS_VERSION = 'tags'
+
+
+class CatalogSnapshot:
+    """
+    Неизменяемый снимок справочника.
+
+    Хранит уже сериализованные в JSON объекты в порядке выдачи API,
+    индекс по идентификатору и отсортированный список названий в нижнем
+    регистре для поиска по префиксу.
+
+    Attributes:
+        version (int): Версия справочника, из которой построен снимок.
+        content (bytes): JSON со всеми объектами справочника.
+    """
+    __slots__ = ('version', 'content', '_ids', '_items', '_positions',
+                 '_names', '_name_positions', '_slugs')
+
+    def __init__(self, version, rows):
+        renderer = JSONRenderer()
+        self.version = version
+        self._ids = tuple(row['id'] for row in rows)
+        self._items = tuple(renderer.render(row) for row in rows)
+        self._positions = {row['id']: index for index, row in enumerate(rows)}
+        self.content = b'[' + b','.join(self._items) + b']'
+        names = sorted((row['name'].lower(), index)
+                       for index, row in enumerate(rows))
+        self._names = tuple(name for name, _ in names)
+        self._name_positions = tuple(index for _, index in names)
+        self._slugs = {row['slug']: row['id'] for row in rows if 'slug' in row}
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, pk):
+        return pk in self._positions
+
+    def get(self, pk):
+        """
+        Возвращает JSON объекта по идентификатору.
+
+        Args:
+            pk (int): Идентификатор объекта.
+
+        Returns:
+            bytes | None: JSON объекта или None, если объект не найден.
+        """
+        index = self._positions.get(pk)
+        return None if index is None else self._items[index]
+
+    def search(self, query, limit=None):
+        """
+        Ищет объекты по названию.
+
+        Args:
+            query (str): Строка поиска.
+            limit (int | None): Максимальное количество результатов.
+
+        Returns:
+            tuple[list, list]: Позиции объектов, название которых
+            начинается со строки поиска, и позиции остальных совпадений.
+        """
+        names, positions = self._names, self._name_positions
+        query = query.lower()
+        prefix = []
+        index = bisect_left(names, query)
+        while index < len(names) and names[index].startswith(query):
+            if limit is not None and len(prefix) >= limit:
+                return prefix, []
+            prefix.append(positions[index])
+            index += 1
+        substring = []
+        for name, position in zip(names, positions):
+            if limit is not None and len(prefix) + len(substring) >= limit:
+                break
+            if query in name and not name.startswith(query):
+                substring.append(position)
+        return prefix, substring
+
+    def slugs(self):
+        """
+        Возвращает слаги объектов справочника.
+        """
+        return self._slugs.keys()
+
+    def slug_ids(self, slugs):
+        """
+        Возвращает отсортированные идентификаторы объектов по слагам.
+
+        Неизвестные слаги пропускаются.
+        """
+        return sorted({self._slugs[slug] for slug in slugs
+                       if slug in self._slugs})
+
+    def ids(self, positions):
+        """
+        Возвращает идентификаторы объектов по их позициям.
+        """
+        return [self._ids[position] for position in positions]
+
+    def render(self, positions):
+        """
+        Собирает JSON-список из объектов на указанных позициях.
+
+        Args:
+            positions: Позиции объектов в снимке.
+
+        Returns:
+            bytes: JSON со списком объектов.
+        """
+        return b'[' + b','.join(self._items[index] for index in positions) + b']'
+
+
+class Catalog:
+    """
+    Справочник, закешированный в памяти процесса.
+
+    Снимок строится при первом обращении и перестраивается, когда
+    меняется версия справочника. Версию обновляют сигналы сохранения
+    и удаления объектов, в том числе из административной панели.
+    """
+
+    def __init__(self, model, serializer_class, version_name):
+        self.model = model
+        self.serializer_class = serializer_class
+        self.version_name = version_name
+        self._snapshot = None
+        self._lock = Lock()
+
+    def snapshot(self):
+        """
+        Возвращает актуальный снимок справочника.
+
+        Returns:
+            CatalogSnapshot: Снимок справочника.
+        """
+        version = get_version(self.version_name)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version != version:
+                rows = self.serializer_class(
+                    self.model.objects.all(), many=True
+                ).data
+                snapshot = CatalogSnapshot(version, rows)
+                self._snapshot = snapshot
+        return snapshot
+
+
+ingredient_catalog = Catalog(Ingredient, IngredientSerializer,
+                             INGREDIENTS_VERSION)
+tag_catalog = Catalog(Tag, TagSerializer, TAGS_VERSION)
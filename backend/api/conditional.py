@@ -0,0 +1,89 @@
+import hashlib
+from functools import wraps
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .relations import relations_version_name
+from .versions import get_versions
+
+USERS_VERSION = 'users'
+NANOSECONDS = 10 ** 9
+
+
+def make_validators(request, versions, stamps=(), per_user=False):
+    """
+    Вычисляет ETag и дату изменения ответа по версиям данных.
+
+    Тело ответа не формируется: ETag — хеш адреса запроса и версий,
+    а дата изменения — наибольшая из версий. Если ответ содержит флаги
+    текущего пользователя, учитываются его идентификатор и версия его
+    связей, поэтому ответы разных пользователей и анонимный ответ
+    не совпадают.
+
+    Args:
+        request: Текущий запрос.
+        versions: Имена версий наборов данных, из которых строится ответ.
+        stamps: Дополнительные версии в наносекундах, например дата
+            изменения объекта.
+        per_user (bool): Зависит ли ответ от текущего пользователя.
+
+    Returns:
+        tuple: ETag и дата изменения в секундах.
+    """
+    names = list(versions)
+    user = 'anonymous'
+    if per_user and request.user.is_authenticated:
+        names.append(relations_version_name(request.user.pk))
+        user = request.user.pk
+    stamps = [*get_versions(names).values(), *stamps]
+    key = '|'.join(map(str, (request.get_full_path(), user, *stamps)))
+    etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+    return etag, max(stamps) // NANOSECONDS
+
+
+def timestamp(value):
+    """
+    Переводит дату в наносекунды, как хранятся версии данных.
+    """
+    return int(value.timestamp() * 1000000) * 1000
+
+
+def conditional(method):
+    """
+    Декоратор действия представления, поддерживающий условные запросы.
+
+    Валидаторы возвращает метод представления get_validators, а заголовки
+    запроса, от которых зависит ответ, задает атрибут conditional_vary. Если
+    клиент прислал актуальные If-None-Match или If-Modified-Since,
+    ответ 304 возвращается без выборки и сериализации данных.
+    Валидаторы вычисляются только для JSON: в остальных форматах
+    ответ содержит данные текущего пользователя.
+
+    Args:
+        method: Действие представления.
+
+    Returns:
+        function: Действие с поддержкой условных запросов.
+    """
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        validators = None
+        if request.accepted_renderer.format == 'json':
+            validators = self.get_validators(request, *args, **kwargs)
+        if validators is None:
+            return method(self, request, *args, **kwargs)
+        etag, last_modified = validators
+        response = get_conditional_response(request, etag=etag,
+                                            last_modified=last_modified)
+        if response is None:
+            response = method(self, request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        vary = getattr(self, 'conditional_vary', ())
+        if vary:
+            patch_vary_headers(response, vary)
+        return response
+
+    return wrapper
@@ -0,0 +1,74 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscription
+from .popularity import POPULARITY_VERSION
+from .versions import bump_version
+
+User = get_user_model()
+
+COUNTERS = (
+    (Favorite, 'recipe', Recipe, 'favorites_count'),
+    (ShoppingCart, 'recipe', Recipe, 'carts_count'),
+    (Subscription, 'author', User, 'followers_count'),
+    (Recipe, 'author', User, 'recipes_count'),
+)
+
+
+def change_counter(model, pk, field, delta):
+    """
+    Атомарно изменяет счетчик объекта выражением F().
+
+    Счетчик не опускается ниже нуля, даже если успел разойтись
+    с фактическим количеством строк.
+
+    Args:
+        model: Модель объекта со счетчиком.
+        pk: Идентификатор объекта.
+        field (str): Имя поля счетчика.
+        delta (int): Изменение счетчика.
+    """
+    queryset = model.objects.filter(pk=pk)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def recalculate_counters():
+    """
+    Пересчитывает все счетчики по фактическим данным.
+
+    Каждый счетчик исправляется одним запросом UPDATE, который затрагивает
+    только строки с расхождением. После счетчиков так же исправляется
+    популярность рецептов, вычисляемая из них.
+
+    Returns:
+        dict: Количество исправленных строк по каждому счетчику.
+    """
+    repaired = {}
+    with transaction.atomic():
+        for source, relation, model, field in COUNTERS:
+            actual = Coalesce(Subquery(
+                source.objects.filter(**{relation: OuterRef('pk')})
+                .values(relation).annotate(count=Count('pk'))
+                .values('count')
+            ), 0)
+            repaired[f'{model._meta.model_name}.{field}'] = (
+                model.objects.exclude(**{field: actual})
+                .update(**{field: actual})
+            )
+        popularity = (
+            F('favorites_count') * settings.POPULARITY_FAVORITE_WEIGHT
+            + F('carts_count') * settings.POPULARITY_CART_WEIGHT
+        )
+        repaired['recipe.popularity'] = (
+            Recipe.objects.exclude(popularity=popularity)
+            .update(popularity=popularity)
+        )
+    if repaired['recipe.popularity']:
+        bump_version(POPULARITY_VERSION)
+    return repaired
@@ -0,0 +1,127 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F, Q
+
+from recipes.models import FeedEntry, Recipe
+from users.models import Subscription
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+
+
+def fan_out_recipes(recipes):
+    """
+    Добавляет новые рецепты в ленты подписчиков их авторов.
+
+    Число подписчиков и подписчики всех авторов загружаются двумя
+    запросами, записи ленты вставляются через bulk_create. Рецепты
+    авторов, у которых не меньше FEED_FANOUT_LIMIT подписчиков, в ленты
+    не записываются: такие авторы отмечаются признаком feed_on_read,
+    и их рецепты подмешиваются при чтении ленты.
+
+    Args:
+        recipes: Новые рецепты.
+    """
+    author_ids = {recipe.author_id for recipe in recipes}
+    mark_feed_on_read(author_ids)
+    authors = User.objects.filter(
+        pk__in=author_ids, followers_count__gt=0, feed_on_read=False
+    ).values_list('pk', flat=True)
+    followers = {}
+    for author_id, user_id in Subscription.objects.filter(
+        author_id__in=list(authors)
+    ).values_list('author_id', 'user_id'):
+        followers.setdefault(author_id, []).append(user_id)
+    FeedEntry.objects.bulk_create(
+        (FeedEntry(user_id=user_id, recipe_id=recipe.pk,
+                   author_id=recipe.author_id, created=recipe.created)
+         for recipe in recipes
+         for user_id in followers.get(recipe.author_id, ())),
+        batch_size=BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def mark_feed_on_read(author_ids):
+    """
+    Отмечает авторов, рецепты которых подмешиваются в ленты при чтении.
+
+    Признак устанавливается авторам с не меньше чем FEED_FANOUT_LIMIT
+    подписчиками и не сбрасывается, когда подписчиков становится меньше:
+    записей ленты для рецептов, опубликованных до этого, нет.
+
+    Args:
+        author_ids: Идентификаторы авторов.
+    """
+    User.objects.filter(
+        pk__in=author_ids, feed_on_read=False,
+        followers_count__gte=settings.FEED_FANOUT_LIMIT
+    ).update(feed_on_read=True)
+
+
+def backfill_feed(user_id, author):
+    """
+    Добавляет в ленту пользователя рецепты автора, на которого он подписался.
+
+    Для авторов с признаком feed_on_read записи не создаются.
+
+    Args:
+        user_id (int): Идентификатор подписчика.
+        author: Автор.
+    """
+    if author.followers_count >= settings.FEED_FANOUT_LIMIT:
+        mark_feed_on_read((author.pk,))
+        return
+    if author.feed_on_read:
+        return
+    recipes = Recipe.objects.filter(author=author).order_by().values_list(
+        'pk', 'created'
+    )
+    FeedEntry.objects.bulk_create(
+        (FeedEntry(user_id=user_id, recipe_id=recipe_id, author_id=author.pk,
+                   created=created)
+         for recipe_id, created in recipes.iterator()),
+        batch_size=BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def prune_feed(user_id, author_id):
+    """
+    Удаляет из ленты пользователя рецепты автора одним запросом.
+
+    Args:
+        user_id (int): Идентификатор бывшего подписчика.
+        author_id (int): Идентификатор автора.
+    """
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def feed_queryset(queryset, user):
+    """
+    Возвращает ленту рецептов авторов, на которых подписан пользователь.
+
+    Обычно лента читается из записей ленты пользователя одним диапазоном
+    индекса (user, created, recipe). Если пользователь подписан на авторов
+    с признаком feed_on_read, их рецепты добавляются к ленте при чтении.
+
+    Args:
+        queryset: Исходный набор запросов рецептов.
+        user: Владелец ленты.
+
+    Returns:
+        QuerySet: Рецепты, упорядоченные от новых к старым по полям
+        feed_created и id.
+    """
+    popular = list(Subscription.objects.filter(
+        user=user, author__feed_on_read=True
+    ).values_list('author_id', flat=True))
+    if not popular:
+        queryset = queryset.filter(feed_entries__user=user).annotate(
+            feed_created=F('feed_entries__created')
+        )
+    else:
+        queryset = queryset.filter(
+            Q(pk__in=FeedEntry.objects.filter(user=user).values('recipe_id'))
+            | Q(author_id__in=popular)
+        ).annotate(feed_created=F('created'))
+    return queryset.order_by('-feed_created', '-id')
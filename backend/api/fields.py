@@ -1,11 +1,25 @@
-import io
 import base64
+import binascii
 import uuid
-from PIL import Image
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
 from rest_framework import serializers
-from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
 from django.core.exceptions import ValidationError
 
+from .images import RENDITIONS, rendition_name
+
+CHUNK_SIZE = 64 * 1024
+SPOOL_MAX_SIZE = 1024 * 1024
+SIGNATURES = (
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+)
+
 
 class Base64ImageField(serializers.ImageField):
     """
@@ -15,40 +29,55 @@ class Base64ImageField(serializers.ImageField):
         """
         Конвертирует данные изображения, закодированные в base64, в файл изображения.
 
+        Размер файла проверяется до декодирования, а сами данные
+        декодируются частями во временный файл, который переносится
+        на диск, если не помещается в SPOOL_MAX_SIZE.
+
         Args:
             data (str): Данные изображения, закодированные в base64.
 
         Returns:
-            SimpleUploadedFile: Декодированный файл изображения.
+            UploadedFile: Декодированный файл изображения.
 
         Raises:
             ValidationError: Если данные не являются допустимыми данными изображения в base64.
         """
-        if isinstance(data, str):
-            if ';base64,' in data:
-                header, base64_data = data.split(';base64,')
-                file_mime_type = header.replace('data:', '')
-                try:
-                    decoded_file = base64.b64decode(base64_data)
-                except:
-                    raise ValidationError('Загрузите валидное изображение')
-                file_name = str(uuid.uuid4())
-                file_extension = self.get_file_extension(decoded_file)
-                complete_file_name = file_name + '.' + file_extension
-                data = SimpleUploadedFile(
-                    name=complete_file_name,
-                    content=decoded_file,
-                    content_type=file_mime_type
-                )
-                return super().to_internal_value(data)
-        return ValidationError('Неверный формат файла')
-
-    def get_file_extension(self, decoded_file):
+        if not isinstance(data, str):
+            return super().to_internal_value(data)
+        separator = data.find(';base64,')
+        if not data.startswith('data:') or separator == -1:
+            raise ValidationError('Неверный формат файла')
+        file_mime_type = data[len('data:'):separator]
+        start = separator + len(';base64,')
+        if (len(data) - start) * 3 // 4 > settings.RECIPE_IMAGE_MAX_SIZE:
+            raise ValidationError('Размер изображения превышает допустимый')
+        file = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        try:
+            for position in range(start, len(data), CHUNK_SIZE):
+                file.write(base64.b64decode(
+                    data[position:position + CHUNK_SIZE], validate=True
+                ))
+        except (binascii.Error, ValueError):
+            file.close()
+            raise ValidationError('Загрузите валидное изображение')
+        size = file.tell()
+        file.seek(0)
+        file_extension = self.get_file_extension(file.read(16))
+        file.seek(0)
+        data = UploadedFile(
+            file=file,
+            name=f'{uuid.uuid4()}.{file_extension}',
+            content_type=file_mime_type,
+            size=size
+        )
+        return super().to_internal_value(data)
+
+    def get_file_extension(self, header):
         """
-        Получает расширение файла изображения.
+        Получает расширение файла изображения по его сигнатуре.
 
         Args:
-            decoded_file (bytes): Декодированные байты файла изображения.
+            header (bytes): Первые байты файла изображения.
 
         Returns:
             str: Расширение файла изображения.
@@ -56,10 +85,46 @@ class Base64ImageField(serializers.ImageField):
         Raises:
             ValidationError: Если файл не является допустимым изображением.
         """
-        try:
-            image = Image.open(io.BytesIO(decoded_file))
-        except:
-            raise ValidationError('Загрузите валидное изображение')
-        else:
-            extension = image.format.lower()
-        return 'jpg' if extension == 'jpeg' else extension
+        if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+            return 'webp'
+        for signature, extension in SIGNATURES:
+            if header.startswith(signature):
+                return extension
+        raise ValidationError('Загрузите валидное изображение')
+
+
+class ImageRenditionsField(serializers.Field):
+    """
+    Поле со ссылками на уменьшенные копии изображения рецепта.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe):
+        """
+        Возвращает ссылки на копии thumb, card и full.
+
+        Пока копии не созданы, все ссылки указывают на исходное изображение.
+        Готовность копий берется из поля renditions_ready рецепта, поэтому
+        хранилище не опрашивается.
+
+        Args:
+            recipe: Объект рецепта.
+
+        Returns:
+            dict | None: Ссылки на копии изображения.
+        """
+        value = recipe.image
+        if not value:
+            return None
+        request = self.context.get('request')
+        ready = recipe.renditions_ready
+        urls = {}
+        for rendition, _ in RENDITIONS:
+            url = (default_storage.url(rendition_name(value.name, rendition))
+                   if ready else value.url)
+            urls[rendition] = (request.build_absolute_uri(url)
+                               if request is not None else url)
+        return urls
@@ -1,13 +1,96 @@
+from django import forms
+from django.db.models import Exists, OuterRef
 from django_filters import rest_framework as filters
+from django_filters.widgets import BaseCSVWidget
+from rest_framework.exceptions import ValidationError
 
 from recipes.models import Ingredient, Recipe
+from .catalog import ingredient_catalog, tag_catalog
+from .popularity import RECIPE_ORDERINGS
+from .search import (INCLUDE_ALL, INCLUDE_MODES, search_ingredients,
+                     search_recipes, search_recipes_by_ingredients)
+
+
+def tag_choices():
+    """
+    Возвращает допустимые слаги тегов из снимка справочника.
+    """
+    return [(slug, slug) for slug in tag_catalog.snapshot().slugs()]
+
+
+class MultipleCSVWidget(BaseCSVWidget, forms.TextInput):
+    """
+    Виджет списка значений из повторяющегося параметра и через запятую.
+    """
+
+    def value_from_datadict(self, data, files, name):
+        """
+        Собирает значения всех параметров с именем name.
+
+        Returns:
+            list | None: Значения или None, если параметр не передан.
+        """
+        if name not in data:
+            return None
+        values = data.getlist(name) if hasattr(data, 'getlist') else [
+            data[name]
+        ]
+        return [item.strip() for value in values
+                for item in value.split(',') if item.strip()]
+
+
+class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
+    """
+    Фильтр по списку целых чисел.
+
+    Значения передаются повторяющимся параметром или через запятую.
+    """
+    field_class = forms.IntegerField
 
 
 class IngredientFilter(filters.FilterSet):
     """
-    Фильтр для ингредиентов, позволяющий фильтровать по имени.
+    Фильтр для ингредиентов, позволяющий искать по имени
+    и ограничивать количество результатов.
     """
-    name = filters.CharFilter(lookup_expr='icontains')
+    name = filters.CharFilter(method='name_filter')
+    limit = filters.NumberFilter(method='limit_filter', min_value=1)
+
+    def name_filter(self, queryset, name, value):
+        """
+        Поиск ингредиентов по имени с ранжированием по релевантности.
+
+        Args:
+            queryset: Исходный набор запросов.
+            name: Имя фильтра.
+            value: Значение фильтра.
+
+        Returns:
+            queryset: Отфильтрованный набор запросов.
+        """
+        limit = self.form.cleaned_data.get('limit')
+        return search_ingredients(queryset, value,
+                                  int(limit) if limit else None)
+
+    def limit_filter(self, queryset, name, value):
+        """
+        Ограничение применяется в filter_queryset после остальных фильтров.
+        """
+        return queryset
+
+    def filter_queryset(self, queryset):
+        """
+        Применяет фильтры и ограничивает количество результатов.
+
+        Args:
+            queryset: Исходный набор запросов.
+
+        Returns:
+            queryset: Отфильтрованный набор запросов.
+        """
+        queryset = super().filter_queryset(queryset)
+        limit = self.form.cleaned_data.get('limit')
+        return queryset[:int(limit)] if limit else queryset
 
     class Meta:
         model = Ingredient
@@ -16,13 +99,114 @@ class IngredientFilter(filters.FilterSet):
 
 class RecipeFilter(filters.FilterSet):
     """
-    Фильтр для рецептов, позволяющий фильтровать по избранным рецептам, корзине покупок и тегам.
+    Фильтр для рецептов, позволяющий фильтровать по избранным рецептам, корзине покупок и тегам,
+    искать по названию и описанию и по набору ингредиентов,
+    а также упорядочивать по популярности.
     """
+    search = filters.CharFilter(method='search_filter')
+    ingredients = NumberInFilter(method='ingredients_filter',
+                                 widget=MultipleCSVWidget)
+    ingredients_mode = filters.ChoiceFilter(
+        choices=[(mode, mode) for mode in INCLUDE_MODES],
+        method='ingredients_mode_filter'
+    )
     is_favorited = filters.BooleanFilter(method='is_favorited_filter')
     is_in_shopping_cart = filters.BooleanFilter(
         method='is_in_shopping_cart_filter'
     )
-    tags = filters.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = filters.MultipleChoiceFilter(choices=tag_choices,
+                                        method='tags_filter')
+    ordering = filters.ChoiceFilter(
+        choices=[(ordering, ordering) for ordering in RECIPE_ORDERINGS],
+        method='ordering_filter'
+    )
+
+    def ordering_filter(self, queryset, name, value):
+        """
+        Упорядочивает рецепты по популярности или по рейтингу трендов.
+
+        Оба значения хранятся в индексированных столбцах, поэтому
+        сортировка не требует агрегирования.
+
+        Args:
+            queryset: Исходный набор запросов.
+            name: Имя фильтра.
+            value: popular или trending.
+
+        Returns:
+            queryset: Упорядоченный набор запросов.
+        """
+        return queryset.order_by(*RECIPE_ORDERINGS[value])
+
+    def tags_filter(self, queryset, name, value):
+        """
+        Фильтр по тегам.
+
+        Слаги переводятся в идентификаторы по снимку справочника тегов,
+        а рецепты отбираются подзапросом EXISTS к связующей таблице,
+        поэтому рецепт с несколькими выбранными тегами не дублируется
+        и не требуется DISTINCT.
+
+        Args:
+            queryset: Исходный набор запросов.
+            name: Имя фильтра.
+            value: Слаги тегов.
+
+        Returns:
+            queryset: Отфильтрованный набор запросов.
+        """
+        recipe_tags = Recipe.tags.through.objects.filter(
+            recipe_id=OuterRef('pk'),
+            tag_id__in=tag_catalog.snapshot().slug_ids(value)
+        )
+        return queryset.filter(Exists(recipe_tags))
+
+    def search_filter(self, queryset, name, value):
+        """
+        Полнотекстовый поиск по названию и описанию рецепта.
+
+        Args:
+            queryset: Исходный набор запросов.
+            name: Имя фильтра.
+            value: Строка поиска.
+
+        Returns:
+            queryset: Найденные рецепты в порядке релевантности.
+        """
+        return search_recipes(queryset, value)
+
+    def ingredients_filter(self, queryset, name, value):
+        """
+        Поиск рецептов по набору ингредиентов.
+
+        Идентификаторы проверяются по словарю позиций снимка справочника
+        ингредиентов за O(1) на каждый.
+        Режим задается параметром ingredients_mode: all — рецепты со всеми
+        ингредиентами, any — хотя бы с одним, subset — рецепты, которые
+        можно приготовить только из указанных ингредиентов.
+
+        Args:
+            queryset: Исходный набор запросов.
+            name: Имя фильтра.
+            value: Идентификаторы ингредиентов.
+
+        Returns:
+            queryset: Найденные рецепты в порядке убывания покрытия.
+        """
+        snapshot = ingredient_catalog.snapshot()
+        unknown = sorted({pk for pk in value if pk not in snapshot})
+        if unknown:
+            raise ValidationError({'ingredients': [
+                f'Ингредиент {pk} не найден' for pk in unknown
+            ]})
+        mode = self.form.cleaned_data.get('ingredients_mode') or INCLUDE_ALL
+        return search_recipes_by_ingredients(queryset, value, mode)
+
+    def ingredients_mode_filter(self, queryset, name, value):
+        """
+        Режим поиска применяется в фильтре ingredients.
+        """
+        return queryset
 
     def is_favorited_filter(self, queryset, name, value):
         """
@@ -0,0 +1,125 @@
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from recipes.models import Recipe
+from .versions import bump_version
+
+RENDITIONS = (
+    ('full', 1280),
+    ('card', 480),
+    ('thumb', 160),
+)
+RENDITION_FORMAT = 'WEBP'
+RENDITION_EXTENSION = 'webp'
+RENDITION_QUALITY = 80
+RENDITIONS_VERSION = 'renditions'
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_RENDITION_WORKERS,
+    thread_name_prefix='renditions'
+)
+
+
+def rendition_name(image_name, rendition):
+    """
+    Возвращает путь уменьшенной копии изображения в хранилище.
+
+    Args:
+        image_name (str): Путь исходного изображения.
+        rendition (str): Название копии: thumb, card или full.
+
+    Returns:
+        str: Путь уменьшенной копии.
+    """
+    directory, file_name = os.path.split(image_name)
+    stem = os.path.splitext(file_name)[0]
+    return os.path.join(directory, 'renditions',
+                        f'{stem}_{rendition}.{RENDITION_EXTENSION}')
+
+
+def has_renditions(image_name):
+    """
+    Проверяет, созданы ли уменьшенные копии изображения.
+
+    Копии сохраняются по порядку, поэтому достаточно проверить последнюю.
+    """
+    return default_storage.exists(
+        rendition_name(image_name, RENDITIONS[-1][0])
+    )
+
+
+def create_renditions(image_name):
+    """
+    Создает уменьшенные копии изображения рецепта.
+
+    Копии создаются от большей к меньшей, каждая следующая уменьшается
+    из предыдущей. Для JPEG декодирование сразу выполняется в уменьшенном
+    масштабе. После создания копий рецепты с этим изображением отмечаются
+    как имеющие копии, а их дата изменения и версия копий обновляются,
+    так как ссылки на копии меняют представление рецептов.
+
+    Args:
+        image_name (str): Путь исходного изображения в хранилище.
+    """
+    with default_storage.open(image_name, 'rb') as file:
+        image = Image.open(file)
+        width = RENDITIONS[0][1]
+        image.draft('RGB', (width, width))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands()
+                                  else 'RGB')
+        for rendition, width in RENDITIONS:
+            image.thumbnail((width, width * 4))
+            buffer = io.BytesIO()
+            image.save(buffer, RENDITION_FORMAT, quality=RENDITION_QUALITY)
+            name = rendition_name(image_name, rendition)
+            default_storage.delete(name)
+            default_storage.save(name, ContentFile(buffer.getvalue()))
+    Recipe.objects.filter(image=image_name).update(renditions_ready=True,
+                                                   updated_at=timezone.now())
+    bump_version(RENDITIONS_VERSION)
+
+
+def run_renditions(image_name):
+    """
+    Создает уменьшенные копии в потоке пула.
+
+    До и после задачи закрываются устаревшие и разорванные соединения
+    с базой данных, как в начале и конце запроса, а ошибки записываются
+    в журнал, так как результат задачи никто не ожидает.
+
+    Args:
+        image_name (str): Путь исходного изображения в хранилище.
+    """
+    close_old_connections()
+    try:
+        create_renditions(image_name)
+    except Exception:
+        logger.exception('Не удалось создать копии изображения %s',
+                         image_name)
+    finally:
+        close_old_connections()
+
+
+def schedule_renditions(image_name):
+    """
+    Ставит создание уменьшенных копий в пул потоков после фиксации транзакции.
+
+    Args:
+        image_name (str): Путь исходного изображения в хранилище.
+    """
+    transaction.on_commit(
+        lambda: executor.submit(run_renditions, image_name)
+    )
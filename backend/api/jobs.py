@@ -0,0 +1,135 @@
+from datetime import timedelta
+from tempfile import TemporaryFile
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from recipes.models import ShoppingListJob
+from .renderers import SHOPPING_LIST_RENDERERS
+from .services import get_shopping_list
+
+RENDERERS = {renderer.format: renderer for renderer in SHOPPING_LIST_RENDERERS}
+
+
+def fail_stale_jobs(**filters):
+    """
+    Помечает ошибочными задачи, зависшие в состоянии выполнения.
+
+    Задача, которая дольше SHOPPING_LIST_JOB_TIMEOUT секунд не менялась,
+    осталась от упавшего или остановленного обработчика. Она не
+    перезапускается, чтобы задача, роняющая обработчик, не выполнялась
+    бесконечно: пользователь может запросить список заново.
+
+    Args:
+        filters: Дополнительные условия отбора задач.
+
+    Returns:
+        int: Количество задач, помеченных ошибочными.
+    """
+    now = timezone.now()
+    return ShoppingListJob.objects.filter(
+        status=ShoppingListJob.RUNNING,
+        updated__lt=now - timedelta(
+            seconds=settings.SHOPPING_LIST_JOB_TIMEOUT
+        ),
+        **filters
+    ).update(status=ShoppingListJob.FAILED,
+             error='Превышено время формирования списка', updated=now)
+
+
+def enqueue_shopping_list(user, format):
+    """
+    Ставит формирование списка покупок в очередь.
+
+    Если для пользователя уже есть незавершенная задача в том же формате,
+    новая задача не создается. Зависшая задача переиспользуется не будет:
+    перед поиском она помечается ошибочной.
+
+    Args:
+        user: Пользователь, запросивший список.
+        format (str): Формат документа.
+
+    Returns:
+        ShoppingListJob: Задача формирования списка.
+    """
+    fail_stale_jobs(user=user, format=format)
+    job = ShoppingListJob.objects.filter(
+        user=user, format=format,
+        status__in=(ShoppingListJob.PENDING, ShoppingListJob.RUNNING)
+    ).first()
+    if job is None:
+        job = ShoppingListJob.objects.create(user=user, format=format)
+    return job
+
+
+def claim_job():
+    """
+    Забирает из очереди самую старую задачу.
+
+    Строка блокируется с пропуском уже заблокированных, поэтому
+    несколько обработчиков не возьмут одну и ту же задачу. Перед этим
+    зависшие задачи помечаются ошибочными.
+
+    Returns:
+        ShoppingListJob | None: Задача или None, если очередь пуста.
+    """
+    fail_stale_jobs()
+    with transaction.atomic():
+        job = (ShoppingListJob.objects
+               .select_for_update(skip_locked=True)
+               .filter(status=ShoppingListJob.PENDING)
+               .order_by('created')
+               .first())
+        if job is not None:
+            job.status = ShoppingListJob.RUNNING
+            job.save(update_fields=('status', 'updated'))
+    return job
+
+
+def process_job(job):
+    """
+    Формирует документ задачи и сохраняет его в файл.
+
+    Документ всегда формируется заново по текущей корзине: обработчик
+    работает в отдельном процессе, и его локальный кеш списков покупок
+    не общий с веб-сервером.
+
+    Args:
+        job (ShoppingListJob): Задача в состоянии выполнения.
+    """
+    renderer = RENDERERS[job.format]()
+    try:
+        document = renderer.stream(get_shopping_list(job.user))
+        with TemporaryFile() as buffer:
+            for chunk in document:
+                buffer.write(chunk)
+            job.file.save(f'{job.pk}.{job.format}', File(buffer), save=False)
+    except Exception as error:
+        job.status = ShoppingListJob.FAILED
+        job.error = str(error)
+    else:
+        job.status = ShoppingListJob.DONE
+    job.save(update_fields=('status', 'file', 'error', 'updated'))
+
+
+def purge_jobs():
+    """
+    Удаляет устаревшие задачи вместе с файлами.
+
+    Returns:
+        int: Количество удаленных задач.
+    """
+    expired = ShoppingListJob.objects.filter(
+        updated__lt=timezone.now() - timedelta(
+            seconds=settings.SHOPPING_LIST_JOB_TTL
+        ),
+        status__in=(ShoppingListJob.DONE, ShoppingListJob.FAILED)
+    )
+    count = 0
+    for job in expired.iterator():
+        job.file.delete(save=False)
+        job.delete()
+        count += 1
+    return count
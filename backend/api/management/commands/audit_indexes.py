@@ -0,0 +1,84 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Exists, F, OuterRef
+
+from api.services import shopping_list_queryset
+from recipes.models import Recipe, Tag
+
+User = get_user_model()
+
+SEQUENTIAL_SCAN = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)(?! USING)\s*$', re.MULTILINE),
+}
+
+
+def canonical_queries(user, tag_ids):
+    """
+    Возвращает основные запросы API в виде пар (название, запрос).
+    """
+    recipe_tags = Recipe.tags.through.objects.filter(
+        recipe_id=OuterRef('pk'), tag_id__in=tag_ids
+    )
+    return (
+        ('recipe_list', Recipe.objects.with_related()[:6]),
+        ('recipes_by_author',
+         Recipe.objects.filter(author=user).order_by('-created', '-id')[:6]),
+        ('recipes_by_tags', Recipe.objects.filter(Exists(recipe_tags))[:6]),
+        ('favorited_recipes',
+         Recipe.objects.filter(in_favorites__user=user)[:6]),
+        ('recipes_in_shopping_cart',
+         Recipe.objects.filter(in_shopping_carts__user=user)[:6]),
+        ('subscriptions',
+         User.objects.filter(in_subscriptions__user=user)
+         .annotate(subscription_id=F('in_subscriptions__id'))
+         .order_by('-subscription_id')[:6]),
+        ('shopping_list', shopping_list_queryset(user)),
+    )
+
+
+class Command(BaseCommand):
+    """
+    Проверка планов основных запросов API.
+
+    Для каждого запроса выполняется EXPLAIN и выводятся таблицы,
+    которые читаются последовательным сканированием. На маленьких
+    таблицах планировщик PostgreSQL выбирает такое сканирование
+    и при наличии индексов, поэтому проверять стоит на реальном объеме.
+    """
+    help = 'Выполняет EXPLAIN основных запросов API и ищет полные сканирования'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int,
+                            help='Идентификатор пользователя для запросов')
+        parser.add_argument('--plans', action='store_true',
+                            help='Выводить планы запросов целиком')
+        parser.add_argument('--strict', action='store_true',
+                            help='Завершаться с ошибкой при полных сканированиях')
+
+    def handle(self, *args, **options):
+        pattern = SEQUENTIAL_SCAN.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(
+                f'База данных {connection.vendor} не поддерживается'
+            )
+        user = User(pk=options['user'] or 0)
+        tag_ids = list(Tag.objects.values_list('pk', flat=True)[:3])
+        flagged = 0
+        for name, queryset in canonical_queries(user, tag_ids):
+            plan = queryset.explain()
+            tables = sorted(set(pattern.findall(plan)))
+            if tables:
+                flagged += 1
+                self.stdout.write(self.style.WARNING(
+                    f'{name}: полное сканирование {", ".join(tables)}'
+                ))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'{name}: OK'))
+            if options['plans']:
+                self.stdout.write(plan)
+        if flagged and options['strict']:
+            raise CommandError(f'Запросов с полным сканированием: {flagged}')
@@ -0,0 +1,66 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.images import RENDITIONS_VERSION, create_renditions, has_renditions
+from api.versions import bump_version
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    """
+    Создание уменьшенных копий для уже загруженных изображений рецептов.
+    """
+    help = 'Создает уменьшенные копии изображений рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Количество параллельных потоков')
+        parser.add_argument('--after-id', type=int, default=0,
+                            help='Продолжить с рецептов с большим id')
+        parser.add_argument('--force', action='store_true',
+                            help='Пересоздать уже существующие копии')
+
+    def handle(self, *args, **options):
+        """
+        Обрабатывает рецепты по возрастанию id.
+
+        Рецепты, отмеченные как имеющие копии, не выбираются, а рецепты,
+        копии которых уже есть в хранилище, только отмечаются с обновлением
+        даты изменения и версии копий, как после создания копий. После каждого
+        обработанного рецепта выводится его id, поэтому прерванную
+        загрузку можно продолжить с --after-id или просто запустить
+        заново.
+        """
+        images = (Recipe.objects.filter(pk__gt=options['after_id'])
+                  .exclude(image='').order_by('pk')
+                  .values_list('pk', 'image'))
+        if not options['force']:
+            images = images.filter(renditions_ready=False)
+        created = skipped = failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            futures = {}
+            for pk, image in images.iterator():
+                if not options['force'] and has_renditions(image):
+                    Recipe.objects.filter(pk=pk).update(
+                        renditions_ready=True, updated_at=timezone.now()
+                    )
+                    skipped += 1
+                    continue
+                futures[executor.submit(create_renditions, image)] = pk
+            for future in as_completed(futures):
+                pk = futures[future]
+                try:
+                    future.result()
+                except Exception as error:
+                    failed += 1
+                    self.stderr.write(f'Рецепт {pk}: {error}')
+                else:
+                    created += 1
+                    self.stdout.write(f'Рецепт {pk}: готово')
+        if skipped:
+            bump_version(RENDITIONS_VERSION)
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: {created}, пропущено: {skipped}, ошибок: {failed}'
+        ))
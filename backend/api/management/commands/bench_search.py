@@ -0,0 +1,106 @@
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+
+from api.benchmark import (analyze, create_author, create_recipes, measure,
+                           rolled_back)
+from api.search import (RECIPES_VERSION, recipe_search_index, search_recipes,
+                        update_search_vectors)
+from api.versions import bump_version
+from recipes.models import Recipe
+
+WORDS = (
+    'борщ', 'суп', 'салат', 'пирог', 'каша', 'котлеты', 'блины', 'рагу',
+    'плов', 'омлет', 'курица', 'говядина', 'свинина', 'рыба', 'грибы',
+    'картофель', 'капуста', 'морковь', 'свекла', 'лук', 'чеснок', 'сыр',
+    'сметана', 'творог', 'яблоки', 'ягоды', 'рис', 'гречка', 'тесто',
+    'домашний', 'быстрый', 'праздничный', 'летний', 'острый', 'сладкий',
+)
+QUERIES = ('борщ', 'картофель грибы', 'домашний пирог ягоды', 'праздн')
+PAGE_SIZE = 6
+
+
+class Command(BaseCommand):
+    """
+    Замер полнотекстового поиска рецептов.
+
+    Создаются синтетические рецепты из случайных слов, после чего
+    для нескольких запросов сравниваются поиск search_recipes
+    и фильтр по вхождению подстроки в название или описание.
+    Без PostgreSQL отдельно замеряется построение индекса в памяти.
+    Данные откатываются после замера.
+    """
+    help = 'Замеряет полнотекстовый поиск рецептов на синтетических данных'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100000,
+                            help='Количество синтетических рецептов')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Количество запусков каждого запроса')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Начальное значение генератора текстов')
+
+    def handle(self, *args, **options):
+        if options['recipes'] < 1 or options['repeat'] < 1:
+            raise CommandError('Количество рецептов и запусков '
+                               'должно быть положительным')
+        with rolled_back():
+            self.create_data(options['recipes'], options['seed'])
+            if connection.vendor != 'postgresql':
+                elapsed, peak = measure(
+                    lambda: recipe_search_index.snapshot_class(
+                        0, recipe_search_index.rows()
+                    )
+                )
+                self.stdout.write(
+                    f'Индекс в памяти: {elapsed * 1000:8.1f} мс, '
+                    f'пик памяти {peak / 1024 / 1024:.1f} МБ'
+                )
+            for query in QUERIES:
+                for name, build in self.queries(query).items():
+                    found = build().count()
+                    elapsed, _ = measure(lambda: self.run(build),
+                                         options['repeat'])
+                    self.stdout.write(
+                        f'{query!r:>24} {name:>8}: '
+                        f'{elapsed * 1000:8.1f} мс, найдено {found}'
+                    )
+
+    def queries(self, query):
+        """
+        Возвращает функции, строящие сравниваемые запросы поиска.
+
+        Поиск search_recipes обращается к индексу при построении запроса,
+        поэтому построение входит в замер.
+        """
+        return {
+            'search': lambda: search_recipes(Recipe.objects.all(), query),
+            'contains': lambda: Recipe.objects.filter(*(
+                Q(name__icontains=word) | Q(text__icontains=word)
+                for word in query.split()
+            )),
+        }
+
+    def run(self, build):
+        """
+        Строит запрос, подсчитывает рецепты и загружает первую страницу.
+        """
+        queryset = build()
+        return queryset.count(), list(queryset[:PAGE_SIZE])
+
+    def create_data(self, count, seed):
+        """
+        Создает рецепты со случайными названиями и описаниями.
+        """
+        generator = random.Random(seed)
+        author = create_author()
+        create_recipes(author, (
+            (' '.join(generator.sample(WORDS, 3)),
+             ' '.join(generator.choices(WORDS, k=30)))
+            for _ in range(count)
+        ))
+        update_search_vectors(Recipe.objects.filter(author=author))
+        bump_version(RECIPES_VERSION)
+        analyze(Recipe)
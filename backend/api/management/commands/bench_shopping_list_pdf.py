@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmark import measure
+from api.pdf import register_font, render_shopping_list_pdf
+from api.services import ShoppingListItem
+
+
+class Command(BaseCommand):
+    """
+    Замер формирования PDF со списком покупок.
+
+    Для каждого размера списка документ формируется целиком, все его
+    части читаются, и выводятся время, пиковая память и размер файла.
+    База данных не используется.
+    """
+    help = 'Замеряет время и память формирования PDF со списком покупок'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+',
+                            default=(10, 1000, 10000),
+                            help='Количество строк списка покупок')
+        parser.add_argument('--repeat', type=int, default=3,
+                            help='Количество запусков для каждого размера')
+
+    def handle(self, *args, **options):
+        if min(options['sizes']) < 0 or options['repeat'] < 1:
+            raise CommandError('Размеры и количество запусков '
+                               'должны быть положительными')
+        register_font()
+        for size in options['sizes']:
+            shopping_list = [
+                ShoppingListItem(f'Ингредиент {number}', 'г', number)
+                for number in range(size)
+            ]
+            length = 0
+
+            def render():
+                nonlocal length
+                length = sum(map(len, render_shopping_list_pdf(shopping_list)))
+
+            elapsed, peak = measure(render, options['repeat'])
+            self.stdout.write(
+                f'{size:>7} строк: {elapsed * 1000:9.1f} мс, '
+                f'пик памяти {peak / 1024:9.1f} КБ, '
+                f'PDF {length / 1024:9.1f} КБ'
+            )
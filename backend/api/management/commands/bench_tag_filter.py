@@ -0,0 +1,88 @@
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmark import (analyze, create_author, create_recipes, measure,
+                           rolled_back)
+from api.catalog import TAGS_VERSION
+from api.filters import RecipeFilter
+from api.versions import bump_version
+from recipes.models import Recipe, Tag
+
+TAG_COUNT = 5
+PAGE_SIZE = 6
+
+
+class Command(BaseCommand):
+    """
+    Замер фильтра рецептов по тегам.
+
+    Создаются синтетические рецепты с одним-тремя тегами из пяти,
+    после чего для трех, четырех и пяти выбранных тегов сравнивается
+    фильтр RecipeFilter с подзапросом EXISTS и прежнее соединение
+    с таблицей тегов с DISTINCT. Замеряются подсчет рецептов и первая
+    страница. Данные откатываются после замера.
+    """
+    help = 'Замеряет фильтр рецептов по тегам на синтетических данных'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100000,
+                            help='Количество синтетических рецептов')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Количество запусков каждого запроса')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Начальное значение генератора тегов')
+
+    def handle(self, *args, **options):
+        if options['recipes'] < 1 or options['repeat'] < 1:
+            raise CommandError('Количество рецептов и запусков '
+                               'должно быть положительным')
+        with rolled_back():
+            slugs = self.create_data(options['recipes'], options['seed'])
+            for count in range(3, TAG_COUNT + 1):
+                selected = slugs[:count]
+                queries = {
+                    'exists': RecipeFilter(
+                        {'tags': selected}, queryset=Recipe.objects.all()
+                    ).qs,
+                    'join': Recipe.objects.filter(
+                        tags__slug__in=selected
+                    ).distinct(),
+                }
+                for name, queryset in queries.items():
+                    found = queryset.count()
+                    elapsed, _ = measure(
+                        lambda: (queryset.count(), list(queryset[:PAGE_SIZE])),
+                        options['repeat']
+                    )
+                    self.stdout.write(
+                        f'{count} тегов, {name:>6}: {elapsed * 1000:8.1f} мс, '
+                        f'найдено {found}'
+                    )
+
+    def create_data(self, count, seed):
+        """
+        Создает теги и рецепты со случайными наборами тегов.
+
+        Returns:
+            list[str]: Слаги созданных тегов.
+        """
+        tags = Tag.objects.bulk_create(
+            Tag(name=f'benchmark-{number}', color=f'#BE{number:04X}',
+                slug=f'benchmark-{number}')
+            for number in range(TAG_COUNT)
+        )
+        bump_version(TAGS_VERSION)
+        recipe_ids = create_recipes(
+            create_author(),
+            ((f'Рецепт {number}', 'Описание') for number in range(count))
+        )
+        generator = random.Random(seed)
+        Recipe.tags.through.objects.bulk_create(
+            (Recipe.tags.through(recipe_id=recipe_id, tag_id=tag.pk)
+             for recipe_id in recipe_ids
+             for tag in generator.sample(tags, generator.randint(1, 3))),
+            batch_size=5000
+        )
+        analyze(Recipe, Recipe.tags.through, Tag)
+        return [tag.slug for tag in tags]
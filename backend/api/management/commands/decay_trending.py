@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.popularity import decay_trend_scores
+
+
+class Command(BaseCommand):
+    """
+    Затухание рейтинга трендов рецептов.
+
+    Команда запускается периодически, например раз в час из cron,
+    с интервалом, равным периоду запуска. Множитель затухания
+    вычисляется так, чтобы рейтинг уменьшался вдвое за
+    TRENDING_HALF_LIFE секунд.
+    """
+    help = 'Уменьшает рейтинг трендов рецептов с учетом прошедшего времени'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=60 * 60,
+                            help='Время с прошлого запуска в секундах')
+        parser.add_argument('--batch-size', type=int, default=10000,
+                            help='Размер диапазона идентификаторов')
+
+    def handle(self, *args, **options):
+        if options['interval'] <= 0:
+            raise CommandError('Интервал должен быть положительным')
+        factor = 0.5 ** (options['interval'] / settings.TRENDING_HALF_LIFE)
+        updated = decay_trend_scores(factor, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Множитель {factor:.6f}, обновлено рецептов: {updated}'
+        ))
@@ -0,0 +1,28 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from api.transfer import BATCH_SIZE, export_recipes
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    """
+    Выгрузка рецептов в NDJSON.
+    """
+    help = 'Выгружает рецепты в формате NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-',
+                            help='Файл для выгрузки, по умолчанию stdout')
+        parser.add_argument('--chunk-size', type=int, default=BATCH_SIZE,
+                            help='Количество рецептов в одной части')
+
+    def handle(self, *args, **options):
+        lines = export_recipes(Recipe.objects.all(), options['chunk_size'])
+        if options['path'] == '-':
+            for line in lines:
+                sys.stdout.buffer.write(line)
+            return
+        with open(options['path'], 'wb') as file:
+            file.writelines(lines)
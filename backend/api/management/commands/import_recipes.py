@@ -0,0 +1,47 @@
+import json
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from api.transfer import BATCH_SIZE, import_recipes
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """
+    Загрузка рецептов из NDJSON.
+    """
+    help = 'Загружает рецепты из файла NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-',
+                            help='Файл для загрузки, по умолчанию stdin')
+        parser.add_argument('--author',
+                            help='Email автора всех рецептов, по умолчанию '
+                                 'автор берется из каждой строки')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help='Количество рецептов в одной пачке')
+
+    def handle(self, *args, **options):
+        author = None
+        if options['author']:
+            try:
+                author = User.objects.get(email=options['author'])
+            except User.DoesNotExist:
+                raise CommandError('Автор не найден')
+        file = (sys.stdin.buffer if options['path'] == '-'
+                else open(options['path'], 'rb'))
+        created = failed = 0
+        with file:
+            for line in import_recipes(file, author, options['batch_size']):
+                result = json.loads(line)
+                if result['status'] == 'created':
+                    created += 1
+                else:
+                    failed += 1
+                    self.stderr.write(line.decode().rstrip())
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено рецептов: {created}, с ошибками: {failed}'
+        ))
@@ -0,0 +1,185 @@
+import csv
+import io
+import json
+import os
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.catalog import INGREDIENTS_VERSION
+from api.versions import bump_version
+from recipes.models import Ingredient
+
+DEFAULT_PATH = os.path.join(settings.BASE_DIR, '..', 'data',
+                            'ingredients.csv')
+READ_SIZE = 64 * 1024
+
+
+def read_csv(file):
+    """
+    Построчно читает ингредиенты из CSV без заголовка.
+
+    Пустые строки пропускаются.
+
+    Raises:
+        CommandError: Если в строке нет названия или единицы измерения,
+            с номером строки файла.
+    """
+    reader = csv.reader(file)
+    for row in reader:
+        row = [value.strip() for value in row]
+        if not any(row):
+            continue
+        if len(row) < 2 or not row[0] or not row[1]:
+            raise CommandError(
+                f'Строка {reader.line_num}: ожидаются название '
+                'и единица измерения'
+            )
+        yield row[0], row[1]
+
+
+def read_json(file):
+    """
+    Читает ингредиенты из JSON-массива по одному объекту.
+
+    Файл читается блоками, поэтому целиком в память не загружается.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    while True:
+        block = file.read(READ_SIZE)
+        buffer += block
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if not started and position < len(buffer):
+                if buffer[position] != '[':
+                    raise CommandError('Ожидается JSON-массив ингредиентов')
+                started = True
+                position += 1
+                continue
+            if position < len(buffer) and buffer[position] == ']':
+                return
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                break
+            try:
+                yield (item['name'].strip(),
+                       item['measurement_unit'].strip())
+            except (AttributeError, KeyError, TypeError):
+                raise CommandError(
+                    'Ожидается объект с name и measurement_unit: '
+                    f'{item!r:.100}'
+                )
+        buffer = buffer[position:]
+        if not block:
+            if buffer.strip():
+                raise CommandError('Некорректный JSON')
+            return
+
+
+def chunks(rows, size):
+    """
+    Разбивает поток строк на списки заданного размера.
+    """
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+class Command(BaseCommand):
+    """
+    Загрузка справочника ингредиентов из CSV или JSON.
+    """
+    help = 'Загружает ингредиенты из CSV или JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=DEFAULT_PATH,
+                            help='Путь к файлу с ингредиентами')
+        parser.add_argument('--format', choices=('csv', 'json'),
+                            help='Формат файла, по умолчанию по расширению')
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help='Количество строк в одной пачке')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = (options['format']
+                       or os.path.splitext(path)[1].lstrip('.').lower())
+        if file_format not in ('csv', 'json'):
+            raise CommandError('Поддерживаются только файлы CSV и JSON')
+        try:
+            file = open(path, encoding='utf-8', newline='')
+        except OSError as error:
+            raise CommandError(error)
+        started = time.perf_counter()
+        with file:
+            rows = read_csv(file) if file_format == 'csv' else read_json(file)
+            if connection.vendor == 'postgresql':
+                processed, created = self.copy(rows, options['chunk_size'])
+            else:
+                processed, created = self.bulk_create(rows,
+                                                      options['chunk_size'])
+        elapsed = time.perf_counter() - started
+        bump_version(INGREDIENTS_VERSION)
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано строк: {processed}, добавлено: {created}, '
+            f'{processed / elapsed if elapsed else processed:.0f} строк/с'
+        ))
+
+    def bulk_create(self, rows, chunk_size):
+        """
+        Загружает ингредиенты пачками через bulk_create.
+
+        Уже существующие ингредиенты пропускаются по ограничению
+        unique_ingredient, поэтому повторная загрузка безопасна.
+        """
+        before = Ingredient.objects.count()
+        processed = 0
+        for chunk in chunks(rows, chunk_size):
+            with transaction.atomic():
+                Ingredient.objects.bulk_create(
+                    (Ingredient(name=name, measurement_unit=unit)
+                     for name, unit in chunk),
+                    ignore_conflicts=True
+                )
+            processed += len(chunk)
+        return processed, Ingredient.objects.count() - before
+
+    def copy(self, rows, chunk_size):
+        """
+        Загружает ингредиенты через COPY во временную таблицу.
+
+        Строки копируются пачками во временную таблицу, откуда одним
+        INSERT ... ON CONFLICT DO NOTHING переносятся в справочник.
+        """
+        table = Ingredient._meta.db_table
+        processed = 0
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMPORARY TABLE ingredient_staging '
+                '(name varchar(100), measurement_unit varchar(20)) '
+                'ON COMMIT DROP'
+            )
+            for chunk in chunks(rows, chunk_size):
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(chunk)
+                buffer.seek(0)
+                cursor.copy_expert(
+                    'COPY ingredient_staging FROM STDIN WITH (FORMAT csv)',
+                    buffer
+                )
+                processed += len(chunk)
+            cursor.execute(
+                f'INSERT INTO {table} (name, measurement_unit) '
+                'SELECT DISTINCT name, measurement_unit '
+                'FROM ingredient_staging '
+                'ON CONFLICT (name, measurement_unit) DO NOTHING'
+            )
+            created = cursor.rowcount
+        return processed, created
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.counters import recalculate_counters
+
+
+class Command(BaseCommand):
+    """
+    Пересчет денормализованных счетчиков рецептов и пользователей.
+    """
+    help = 'Пересчитывает счетчики избранного, корзин, рецептов и подписчиков'
+
+    def handle(self, *args, **options):
+        for counter, repaired in recalculate_counters().items():
+            self.stdout.write(f'{counter}: исправлено {repaired}')
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.jobs import claim_job, process_job, purge_jobs
+
+
+class Command(BaseCommand):
+    """
+    Обработчик очереди фонового формирования списков покупок.
+    """
+    help = 'Формирует списки покупок из очереди задач'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Обработать очередь и завершиться')
+        parser.add_argument('--sleep', type=float, default=1.0,
+                            help='Пауза между проверками пустой очереди')
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_job()
+            if job is not None:
+                process_job(job)
+                self.stdout.write(f'Задача {job.pk}: {job.status}')
+                continue
+            purged = purge_jobs()
+            if purged:
+                self.stdout.write(f'Удалено устаревших задач: {purged}')
+            if options['once']:
+                break
+            time.sleep(options['sleep'])
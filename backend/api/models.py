@@ -0,0 +1,22 @@
+from django.db import models
+
+
+class DataVersion(models.Model):
+    """
+    Модель версии именованного набора данных.
+
+    Версии хранятся в базе данных, поэтому изменения, сделанные
+    в любом процессе — веб-сервере, фоновом обработчике или команде
+    управления, — сразу видны всем остальным.
+
+    Attributes:
+        name (CharField): Имя набора данных.
+        value (BigIntegerField): Версия — время последнего изменения
+            в наносекундах.
+    """
+    name = models.CharField('Имя', max_length=150, primary_key=True)
+    value = models.BigIntegerField('Версия')
+
+    class Meta:
+        verbose_name = 'Версия данных'
+        verbose_name_plural = 'Версии данных'
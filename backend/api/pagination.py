@@ -1,9 +1,323 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import hashlib
+import json
+from datetime import date
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .versions import get_versions
+
+
+def estimate_count(queryset):
+    """
+    Возвращает оценку количества строк таблицы по статистике планировщика.
+
+    Оценка берется из pg_class.reltuples и используется только в PostgreSQL
+    для таблиц не меньше PAGINATION_COUNT_ESTIMATE_MIN строк: на небольших
+    таблицах точный подсчет дешев, а статистика может быть неактуальной.
+
+    Args:
+        queryset: Набор запросов без условий фильтрации.
+
+    Returns:
+        int | None: Оценка количества строк или None, если ее нет.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                       [queryset.model._meta.db_table])
+        row = cursor.fetchone()
+    if row is None or row[0] < settings.PAGINATION_COUNT_ESTIMATE_MIN:
+        return None
+    return int(row[0])
+
+
+class CountCachingPaginator(Paginator):
+    """
+    Пагинатор, кеширующий общее количество записей.
+
+    Количество для набора фильтров кешируется на
+    PAGINATION_COUNT_CACHE_TIMEOUT секунд по ключу из текста SQL-запроса
+    и версий данных, от которых зависит выборка, поэтому одинаковые
+    фильтры в любом порядке параметров используют одну запись кеша,
+    а после изменения данных количество подсчитывается заново.
+    Для списков без фильтров используется оценка планировщика,
+    и такое количество помечается как приблизительное.
+
+    Attributes:
+        versions: Имена версий данных, входящие в ключ кеша.
+    """
+
+    def __init__(self, *args, versions=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.approximate = False
+        self.versions = versions
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return super().count
+        query = queryset.query
+        if not query.where and not query.distinct and not query.is_sliced:
+            estimate = estimate_count(queryset)
+            if estimate is not None:
+                self.approximate = True
+                return estimate
+        try:
+            sql, params = (queryset.order_by().values('pk')
+                           .query.sql_with_params())
+        except EmptyResultSet:
+            return 0
+        versions = tuple(get_versions(self.versions).values())
+        key = 'count:' + hashlib.md5(
+            repr((sql, params, versions)).encode()
+        ).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, settings.PAGINATION_COUNT_CACHE_TIMEOUT)
+        return count
 
 
 class LimitedPageNumberPagination(PageNumberPagination):
     """
     Кастомный пагинатор для ограниченного числа страниц.
+
+    Общее количество записей кешируется с учетом версий данных, которые
+    возвращает метод представления get_count_versions, а признак
+    count_approximate в ответе показывает, что вместо точного количества
+    отдана оценка.
     """
     page_size = 6
     page_size_query_param = 'limit'
+    count_versions = ()
+
+    @property
+    def django_paginator_class(self):
+        """
+        Возвращает пагинатор с версиями данных текущей выборки.
+        """
+        return partial(CountCachingPaginator, versions=self.count_versions)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Запоминает версии данных представления и возвращает страницу.
+
+        Returns:
+            list | None: Объекты страницы.
+        """
+        get_count_versions = getattr(view, 'get_count_versions', None)
+        if get_count_versions is not None:
+            self.count_versions = get_count_versions()
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        """
+        Возвращает страницу с признаком приблизительного количества.
+
+        Returns:
+            Response: Ответ с полем count_approximate.
+        """
+        response = super().get_paginated_response(data)
+        response.data['count_approximate'] = self.page.paginator.approximate
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        """
+        Добавляет поле count_approximate в схему ответа.
+        """
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count_approximate'] = {
+            'type': 'boolean',
+        }
+        return response_schema
+
+
+class KeysetPagination(BasePagination):
+    """
+    Пагинатор по ключу сортировки (keyset).
+
+    Следующая страница выбирается условием на значения ключа последней
+    записи текущей страницы, а не смещением, поэтому глубокие страницы
+    обходятся так же дешево, как первая. Общее количество записей
+    не подсчитывается.
+
+    Ключ сортировки берется из атрибута cursor_ordering представления
+    и должен быть уникальным, например ('-created', '-id'). Если ключа
+    нет (None), выдача упорядочена иначе, например по релевантности,
+    и пагинация по курсору отклоняется.
+    """
+    page_size = LimitedPageNumberPagination.page_size
+    page_size_query_param = 'limit'
+    cursor_query_param = 'cursor'
+    ordering = ('-id',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Возвращает страницу записей после переданного курсора.
+
+        Raises:
+            NotFound: Если курсор некорректен.
+            ValidationError: Если для выдачи нет ключа сортировки.
+        """
+        self.request = request
+        self.ordering = getattr(view, 'cursor_ordering', self.ordering)
+        if self.ordering is None:
+            raise ValidationError({self.cursor_query_param: [
+                'Пагинация по курсору недоступна для выдачи, '
+                'упорядоченной по релевантности'
+            ]})
+        self.page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(
+                self.get_position_filter(queryset.model, cursor)
+            )
+        page = list(queryset[:self.page_size + 1])
+        self.has_next = len(page) > self.page_size
+        self.page = page[:self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        """
+        Возвращает размер страницы из параметра limit.
+        """
+        value = request.query_params.get(self.page_size_query_param, '')
+        if value.isdigit() and int(value) > 0:
+            return int(value)
+        return self.page_size
+
+    def get_position_filter(self, model, cursor):
+        """
+        Строит условие выборки записей, следующих за позицией курсора.
+
+        Для ключа (a, b) условие имеет вид a < x OR (a = x AND b < y),
+        для полей с сортировкой по возрастанию знаки меняются.
+        """
+        values = self.decode_cursor(model, cursor)
+        position = Q()
+        for index, field in reversed(tuple(enumerate(self.ordering))):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition = Q(**{f'{name}__{lookup}': values[index]})
+            if position:
+                condition |= Q(**{name: values[index]}) & position
+            position = condition
+        return position
+
+    def encode_cursor(self, instance):
+        """
+        Кодирует значения ключа сортировки записи в строку курсора.
+
+        Даты сохраняются с микросекундами, чтобы записи с почти
+        одинаковым временем не пропускались.
+        """
+        values = [getattr(instance, field.lstrip('-'))
+                  for field in self.ordering]
+        data = json.dumps([value.isoformat() if isinstance(value, date)
+                           else value for value in values]).encode()
+        return base64.urlsafe_b64encode(data).decode()
+
+    def decode_cursor(self, model, cursor):
+        """
+        Декодирует строку курсора в значения ключа сортировки.
+
+        Raises:
+            NotFound: Если курсор некорректен.
+        """
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if (not isinstance(values, list)
+                    or len(values) != len(self.ordering)):
+                raise ValueError
+            return [self.to_python(model, field.lstrip('-'), value)
+                    for field, value in zip(self.ordering, values)]
+        except (binascii.Error, ValueError, DjangoValidationError):
+            raise NotFound('Некорректный курсор')
+
+    def to_python(self, model, name, value):
+        """
+        Приводит значение из курсора к типу поля модели.
+
+        Значения аннотаций возвращаются без изменений.
+        """
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return value
+        return field.to_python(value)
+
+    def get_next_link(self):
+        """
+        Возвращает ссылку на следующую страницу.
+        """
+        if not self.has_next:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(),
+                                   self.cursor_query_param,
+                                   self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        """
+        Возвращает ответ со ссылкой на следующую страницу и записями.
+        """
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        """
+        Возвращает схему ответа со ссылкой на следующую страницу.
+        """
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True,
+                         'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class CursorPaginationMixin:
+    """
+    Включает пагинацию по ключу, если в запросе передан параметр cursor.
+
+    Без параметра используется обычный pagination_class, поэтому
+    существующие клиенты получают прежний формат ответа. Первая
+    страница в режиме курсора запрашивается с пустым cursor.
+    """
+    cursor_pagination_class = KeysetPagination
+    cursor_ordering = ('-id',)
+
+    @property
+    def paginator(self):
+        """
+        Возвращает пагинатор по ключу, если передан параметр cursor,
+        иначе пагинатор pagination_class.
+
+        Returns:
+            BasePagination | None: Пагинатор представления.
+        """
+        if (not hasattr(self, '_paginator')
+                and self.cursor_pagination_class is not None
+                and self.cursor_pagination_class.cursor_query_param
+                in self.request.query_params):
+            self._paginator = self.cursor_pagination_class()
+        return super().paginator
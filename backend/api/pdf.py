@@ -0,0 +1,68 @@
+import os
+from functools import lru_cache
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+FONT_NAME = 'DejaVuSans'
+FONT_PATH = os.path.join(settings.BASE_DIR, 'fonts', 'DejaVuSans.ttf')
+FONT_SIZE = 12
+TOP = 750
+BOTTOM = 50
+X_OFFSET = 50
+CHUNK_SIZE = 64 * 1024
+SPOOL_MAX_SIZE = 1024 * 1024
+
+
+@lru_cache(maxsize=None)
+def register_font():
+    """
+    Регистрирует шрифт с поддержкой кириллицы один раз на процесс.
+    """
+    pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH, 'UTF-8'))
+
+
+def _start_page(c):
+    """
+    Настраивает шрифт новой страницы и возвращает начальную координату y.
+    """
+    c.setFont(FONT_NAME, FONT_SIZE)
+    return TOP
+
+
+def render_shopping_list_pdf(shopping_list):
+    """
+    Формирует PDF со списком покупок и отдает его частями.
+
+    Документ пишется во временный файл, который остается в памяти, пока
+    не превысит SPOOL_MAX_SIZE, после чего переносится на диск. Когда
+    строки не помещаются на странице, начинается новая.
+
+    Args:
+        shopping_list: Строки списка покупок.
+
+    Yields:
+        bytes: Очередная часть PDF-документа.
+    """
+    register_font()
+    with SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as buffer:
+        c = canvas.Canvas(buffer, pagesize=letter)
+        y = _start_page(c)
+        c.drawString(X_OFFSET, y, 'Список ингредиентов в корзине:')
+        for item in shopping_list:
+            if y - 35 < BOTTOM:
+                c.showPage()
+                y = _start_page(c) + 20
+            y -= 20
+            c.drawString(X_OFFSET, y, f'{item.name}:')
+            y -= 15
+            c.drawString(X_OFFSET + 20, y,
+                         f'- {item.amount} {item.measurement_unit}')
+        c.save()
+        buffer.seek(0)
+        while chunk := buffer.read(CHUNK_SIZE):
+            yield chunk
@@ -0,0 +1,98 @@
+from django.conf import settings
+from django.db.models import F, Max, Min
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from .versions import bump_version
+
+POPULARITY_VERSION = 'popularity'
+RECIPE_ORDERINGS = {
+    'popular': ('-popularity', '-id'),
+    'trending': ('-trend_score', '-id'),
+}
+
+
+def score_weights():
+    """
+    Возвращает вес добавления рецепта для каждой модели связи.
+    """
+    return {
+        Favorite: settings.POPULARITY_FAVORITE_WEIGHT,
+        ShoppingCart: settings.POPULARITY_CART_WEIGHT,
+    }
+
+
+def trend_contribution(weight, created):
+    """
+    Возвращает вклад добавления в рейтинг трендов на текущий момент.
+
+    Вклад уменьшается вдвое за каждые TRENDING_HALF_LIFE секунд
+    с момента добавления, как и рейтинг при затухании.
+
+    Args:
+        weight (int): Вес добавления.
+        created (datetime): Дата добавления.
+
+    Returns:
+        float: Вклад добавления с учетом затухания.
+    """
+    age = max((timezone.now() - created).total_seconds(), 0)
+    return weight * 0.5 ** (age / settings.TRENDING_HALF_LIFE)
+
+
+def change_popularity(recipe_id, delta, trend_delta=None):
+    """
+    Изменяет популярность и рейтинг трендов рецепта одним запросом UPDATE.
+
+    Значения не опускаются ниже нуля: затухание применяется командой
+    периодически, поэтому вклад удаляемого добавления может оказаться
+    немного больше оставшегося рейтинга, а популярность — разойтись
+    с фактическими данными.
+
+    Args:
+        recipe_id (int): Идентификатор рецепта.
+        delta (int): Изменение популярности.
+        trend_delta (float | None): Изменение рейтинга трендов, по умолчанию
+            равно изменению популярности.
+    """
+    if trend_delta is None:
+        trend_delta = delta
+    queryset = Recipe.objects.filter(pk=recipe_id)
+    if delta < 0:
+        queryset = queryset.filter(popularity__gte=-delta)
+    queryset.update(popularity=F('popularity') + delta,
+                    trend_score=Greatest(F('trend_score') + trend_delta, 0.0))
+
+
+def decay_trend_scores(factor, batch_size=10000, threshold=0.01):
+    """
+    Уменьшает рейтинг трендов всех рецептов в заданное число раз.
+
+    Рейтинг пересчитывается запросами UPDATE по диапазонам
+    идентификаторов, чтобы не блокировать всю таблицу одной транзакцией.
+    Рейтинг ниже threshold обнуляется, версия популярности обновляется.
+
+    Args:
+        factor (float): Множитель затухания от 0 до 1.
+        batch_size (int): Размер диапазона идентификаторов.
+        threshold (float): Порог, ниже которого рейтинг обнуляется.
+
+    Returns:
+        int: Количество измененных рецептов.
+    """
+    bounds = Recipe.objects.filter(trend_score__gt=0).aggregate(
+        first=Min('pk'), last=Max('pk')
+    )
+    if bounds['first'] is None:
+        return 0
+    updated = 0
+    for start in range(bounds['first'], bounds['last'] + 1, batch_size):
+        batch = Recipe.objects.filter(pk__gte=start, pk__lt=start + batch_size,
+                                      trend_score__gt=0)
+        updated += batch.filter(trend_score__lt=threshold / factor).update(
+            trend_score=0
+        )
+        updated += batch.update(trend_score=F('trend_score') * factor)
+    bump_version(POPULARITY_VERSION)
+    return updated
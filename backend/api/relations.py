@@ -0,0 +1,171 @@
+from django.contrib.auth import get_user_model
+from django.db.models import CharField, Value
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscription
+
+User = get_user_model()
+
+FAVORITES = 'favorites'
+CART = 'cart'
+FOLLOWING = 'following'
+
+
+def relations_version_name(user_id):
+    """
+    Возвращает имя версии связей пользователя.
+
+    Версия обновляется при изменении избранного, корзины и подписок
+    пользователя и входит в валидаторы ответов с его флагами.
+    """
+    return f'relations:{user_id}'
+
+
+class UserRelations:
+    """
+    Связи текущего пользователя с объектами сериализуемой страницы.
+
+    Перед сериализацией представление передает рецепты и авторов
+    страницы в load_for, и признаки избранного, корзины и подписки
+    для них загружаются одним запросом с условиями recipe_id IN
+    и author_id IN, поэтому объем запроса ограничен размером страницы,
+    а не количеством связей пользователя. Объекты вне страницы
+    догружаются при первой проверке.
+
+    Attributes:
+        user: Текущий пользователь.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self._recipes = set()
+        self._authors = set()
+        self._ids = {FAVORITES: set(), CART: set(), FOLLOWING: set()}
+
+    def load(self, recipes=(), authors=()):
+        """
+        Загружает связи пользователя с рецептами и авторами одним запросом.
+
+        Уже загруженные идентификаторы повторно не запрашиваются.
+
+        Args:
+            recipes: Идентификаторы рецептов.
+            authors: Идентификаторы авторов.
+        """
+        if self.user is None or self.user.is_anonymous:
+            return
+        recipes = set(recipes) - self._recipes
+        authors = set(authors) - self._authors
+        kind = CharField()
+        queries = []
+        if recipes:
+            queries.extend(
+                model.objects.filter(user=self.user, recipe_id__in=recipes)
+                .values_list(Value(name, output_field=kind), 'recipe_id')
+                for name, model in ((FAVORITES, Favorite),
+                                    (CART, ShoppingCart))
+            )
+        if authors:
+            queries.append(
+                Subscription.objects.filter(user=self.user,
+                                            author_id__in=authors)
+                .values_list(Value(FOLLOWING, output_field=kind), 'author_id')
+            )
+        if not queries:
+            return
+        rows = queries[0].union(*queries[1:], all=True)
+        for name, pk in rows:
+            self._ids[name].add(pk)
+        self._recipes |= recipes
+        self._authors |= authors
+
+    def load_for(self, objects):
+        """
+        Загружает связи для рецептов и пользователей страницы.
+
+        Для рецепта загружаются его флаги и подписка на его автора,
+        для пользователя — подписка на него.
+
+        Args:
+            objects: Сериализуемые объекты.
+        """
+        recipes, authors = set(), set()
+        for obj in objects:
+            if isinstance(obj, Recipe):
+                recipes.add(obj.pk)
+                authors.add(obj.author_id)
+            elif isinstance(obj, User):
+                authors.add(obj.pk)
+        self.load(recipes, authors)
+
+    def is_favorited(self, recipe):
+        """
+        Проверяет, находится ли рецепт в избранном.
+        """
+        self.load(recipes=(recipe.pk,))
+        return recipe.pk in self._ids[FAVORITES]
+
+    def is_in_shopping_cart(self, recipe):
+        """
+        Проверяет, находится ли рецепт в корзине покупок.
+        """
+        self.load(recipes=(recipe.pk,))
+        return recipe.pk in self._ids[CART]
+
+    def is_subscribed(self, author):
+        """
+        Проверяет, подписан ли пользователь на автора.
+        """
+        self.load(authors=(author.pk,))
+        return author.pk in self._ids[FOLLOWING]
+
+
+def get_user_relations(context):
+    """
+    Возвращает связи пользователя из контекста сериализатора.
+
+    Если представление не передало связи в контекст, они создаются
+    и сохраняются в нем, так что вложенные сериализаторы, разделяющие
+    контекст корневого, используют один объект.
+
+    Args:
+        context (dict): Контекст сериализатора.
+
+    Returns:
+        UserRelations: Связи текущего пользователя.
+    """
+    relations = context.get('relations')
+    if relations is None:
+        request = context.get('request')
+        relations = UserRelations(getattr(request, 'user', None))
+        context['relations'] = relations
+    return relations
+
+
+class UserRelationsMixin:
+    """
+    Добавляет в контекст сериализатора связи текущего пользователя
+    и загружает их для сериализуемых объектов.
+    """
+
+    def get_serializer_context(self):
+        """
+        Возвращает контекст сериализатора со связями пользователя.
+        """
+        context = super().get_serializer_context()
+        context['relations'] = UserRelations(self.request.user)
+        return context
+
+    def get_serializer(self, *args, **kwargs):
+        """
+        Возвращает сериализатор, загрузив связи для его объектов.
+
+        Объекты страницы передаются в связи до сериализации, поэтому
+        флаги всей страницы загружаются одним запросом.
+        """
+        serializer = super().get_serializer(*args, **kwargs)
+        instance = args[0] if args else kwargs.get('instance')
+        if instance is not None:
+            objects = instance if kwargs.get('many') else (instance,)
+            serializer.context['relations'].load_for(objects)
+        return serializer
@@ -0,0 +1,109 @@
+import csv
+import io
+import json
+
+from rest_framework import renderers
+
+
+class ShoppingListRenderer(renderers.BaseRenderer):
+    """
+    Базовый рендерер списка покупок.
+
+    Рендереры участвуют в согласовании формата через параметр format
+    и заголовок Accept, а сам документ отдают частями через stream().
+    """
+    charset = 'utf-8'
+
+    def stream(self, shopping_list):
+        """
+        Отдает документ со списком покупок частями.
+
+        Args:
+            shopping_list: Строки списка покупок.
+
+        Yields:
+            bytes: Очередная часть документа.
+        """
+        raise NotImplementedError
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """
+        Отрисовывает ответы с ошибками в JSON.
+
+        Returns:
+            bytes: Тело ответа.
+        """
+        response = (renderer_context or {}).get('response')
+        if response is not None:
+            response['Content-Type'] = 'application/json'
+        return renderers.JSONRenderer().render(data)
+
+
+class PDFShoppingListRenderer(ShoppingListRenderer):
+    """
+    Рендерер списка покупок в PDF.
+    """
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+
+    def stream(self, shopping_list):
+        from .pdf import render_shopping_list_pdf
+
+        return render_shopping_list_pdf(shopping_list)
+
+
+class TextShoppingListRenderer(ShoppingListRenderer):
+    """
+    Рендерер списка покупок в простой текст.
+    """
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def stream(self, shopping_list):
+        yield 'Список ингредиентов в корзине:\n'.encode(self.charset)
+        for item in shopping_list:
+            yield (f'{item.name} ({item.measurement_unit}) — {item.amount}\n'
+                   .encode(self.charset))
+
+
+class CSVShoppingListRenderer(ShoppingListRenderer):
+    """
+    Рендерер списка покупок в CSV.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, shopping_list):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(('name', 'measurement_unit', 'amount'))
+        for item in shopping_list:
+            writer.writerow(item)
+            yield buffer.getvalue().encode(self.charset)
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue().encode(self.charset)
+
+
+class JSONShoppingListRenderer(ShoppingListRenderer):
+    """
+    Рендерер списка покупок в JSON.
+    """
+    media_type = 'application/json'
+    format = 'json'
+
+    def stream(self, shopping_list):
+        yield b'['
+        for index, item in enumerate(shopping_list):
+            chunk = json.dumps(item._asdict(), ensure_ascii=False)
+            yield (chunk if not index else ',' + chunk).encode(self.charset)
+        yield b']'
+
+
+SHOPPING_LIST_RENDERERS = (
+    PDFShoppingListRenderer,
+    TextShoppingListRenderer,
+    CSVShoppingListRenderer,
+    JSONShoppingListRenderer,
+)
@@ -0,0 +1,484 @@
+import heapq
+import re
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from threading import Lock, local
+
+from django.conf import settings
+
+from django.contrib.postgres.expressions import ArraySubquery
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection, transaction
+from django.db.models import (Case, F, FloatField, Func, IntegerField,
+                              OuterRef, Value, When)
+
+from recipes.models import AmountIngredient, Recipe, ShoppingCart
+from .cache import bump_cart_versions
+from .versions import bump_version, get_version
+
+RECIPES_VERSION = 'recipes'
+SEARCH_CONFIG = 'russian'
+NAME_WEIGHT = 1.0
+TEXT_WEIGHT = 0.4
+WORD_RE = re.compile(r'\w+')
+INCLUDE_ALL = 'all'
+INCLUDE_ANY = 'any'
+INCLUDE_SUBSET = 'subset'
+INCLUDE_MODES = (INCLUDE_ALL, INCLUDE_ANY, INCLUDE_SUBSET)
+
+_state = local()
+
+
+def search_ingredients(queryset, query, limit=None):
+    """
+    Ищет ингредиенты по названию с ранжированием по релевантности.
+
+    Сначала идут ингредиенты, название которых начинается со строки
+    поиска, затем те, где она встречается внутри названия. В PostgreSQL
+    поиск выполняется запросом с триграммным GIN-индексом, в остальных
+    базах данных — по снимку справочника в памяти.
+
+    Args:
+        queryset: Исходный набор запросов ингредиентов.
+        query (str): Строка поиска.
+        limit (int | None): Максимальное количество результатов.
+
+    Returns:
+        QuerySet: Найденные ингредиенты в порядке релевантности.
+    """
+    if connection.vendor == 'postgresql':
+        queryset = queryset.filter(name__icontains=query).annotate(
+            rank=Case(When(name__istartswith=query, then=Value(0)),
+                      default=Value(1), output_field=IntegerField())
+        )
+    else:
+        from .catalog import ingredient_catalog
+
+        snapshot = ingredient_catalog.snapshot()
+        prefix, substring = snapshot.search(query, limit)
+        prefix = snapshot.ids(prefix)
+        queryset = queryset.filter(
+            pk__in=prefix + snapshot.ids(substring)
+        ).annotate(
+            rank=Case(When(pk__in=prefix, then=Value(0)),
+                      default=Value(1), output_field=IntegerField())
+        )
+    return queryset.order_by('rank', 'name')
+
+
+def recipe_search_vector():
+    """
+    Возвращает выражение поискового вектора рецепта.
+
+    Название имеет вес A, описание — вес B.
+    """
+    return (SearchVector('name', weight='A', config=SEARCH_CONFIG)
+            + SearchVector('text', weight='B', config=SEARCH_CONFIG))
+
+
+def update_search_vectors(queryset):
+    """
+    Пересчитывает поисковые векторы рецептов одним запросом UPDATE.
+
+    Векторы хранятся только в PostgreSQL, в остальных базах данных
+    используется индекс в памяти.
+
+    Args:
+        queryset: Набор запросов рецептов.
+    """
+    if connection.vendor == 'postgresql':
+        queryset.update(search_vector=recipe_search_vector())
+
+
+def update_ingredient_ids(queryset):
+    """
+    Пересчитывает массивы идентификаторов ингредиентов рецептов
+    одним запросом UPDATE.
+
+    Массивы с GIN-индексом хранятся только в PostgreSQL, в остальных
+    базах данных используется индекс в памяти.
+
+    Args:
+        queryset: Набор запросов рецептов.
+    """
+    if connection.vendor == 'postgresql':
+        queryset.update(ingredient_ids=ArraySubquery(
+            AmountIngredient.objects.filter(recipe=OuterRef('pk'))
+            .order_by('ingredient_id').values('ingredient_id')
+        ))
+
+
+def refresh_recipe_on_commit(recipe_id):
+    """
+    Запоминает рецепт, ингредиенты которого изменились.
+
+    Рецепты копятся до фиксации транзакции, после чего массивы
+    ингредиентов пересчитываются, а списки покупок и версия рецептов
+    сбрасываются один раз, сколько бы строк ни изменилось. После отката
+    рецепты обрабатываются при следующей фиксации: пересчет повторяем.
+    Внутри recipe_ingredients_batch() вызов ничего не делает.
+
+    Args:
+        recipe_id (int): Идентификатор рецепта.
+    """
+    if getattr(_state, 'batch', False):
+        return
+    pending = getattr(_state, 'recipe_ids', None)
+    if pending is None:
+        pending = _state.recipe_ids = set()
+    pending.add(recipe_id)
+    transaction.on_commit(_refresh_recipes)
+
+
+def _refresh_recipes():
+    """
+    Обрабатывает рецепты, накопленные refresh_recipe_on_commit.
+    """
+    recipe_ids, _state.recipe_ids = getattr(_state, 'recipe_ids', None), None
+    if not recipe_ids:
+        return
+    update_ingredient_ids(Recipe.objects.filter(pk__in=recipe_ids))
+    bump_cart_versions(ShoppingCart.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list('user_id', flat=True))
+    bump_version(RECIPES_VERSION)
+
+
+@contextmanager
+def recipe_ingredients_batch():
+    """
+    Отключает обработку изменений отдельных строк ингредиентов.
+
+    Используется кодом, который сам пересчитывает массивы ингредиентов
+    и сбрасывает списки покупок и версию рецептов после массовой записи.
+    """
+    previous = getattr(_state, 'batch', False)
+    _state.batch = True
+    try:
+        yield
+    finally:
+        _state.batch = previous
+
+
+def tokenize(text):
+    """
+    Разбивает текст на слова в нижнем регистре.
+    """
+    return WORD_RE.findall(text.lower().replace('ё', 'е'))
+
+
+class RecipeSearchSnapshot:
+    """
+    Неизменяемый обратный индекс слов названий и описаний рецептов.
+
+    Слова хранятся в отсортированном кортеже, поэтому слово запроса
+    сопоставляется со всеми словами, которые с него начинаются, что
+    заменяет стемминг при поиске без PostgreSQL.
+
+    Attributes:
+        version (int): Версия рецептов, из которой построен индекс.
+    """
+    __slots__ = ('version', '_words', '_postings')
+
+    def __init__(self, version, rows):
+        postings = defaultdict(dict)
+        for pk, name, text in rows:
+            for word in set(tokenize(name)):
+                postings[word][pk] = NAME_WEIGHT
+            for word in set(tokenize(text)):
+                postings[word][pk] = postings[word].get(pk, 0) + TEXT_WEIGHT
+        self.version = version
+        self._words = tuple(sorted(postings))
+        self._postings = tuple(postings[word] for word in self._words)
+
+    def search(self, query):
+        """
+        Ищет рецепты, содержащие все слова запроса.
+
+        Args:
+            query (str): Строка поиска.
+
+        Returns:
+            dict: Ранг каждого найденного рецепта по его идентификатору.
+        """
+        scores = None
+        for word in set(tokenize(query)):
+            matches = {}
+            index = bisect_left(self._words, word)
+            while (index < len(self._words)
+                   and self._words[index].startswith(word)):
+                for pk, weight in self._postings[index].items():
+                    if weight > matches.get(pk, 0):
+                        matches[pk] = weight
+                index += 1
+            if scores is None:
+                scores = matches
+            else:
+                scores = {pk: score + matches[pk]
+                          for pk, score in scores.items() if pk in matches}
+            if not scores:
+                break
+        return scores or {}
+
+
+class RecipeIngredientSnapshot:
+    """
+    Неизменяемый обратный индекс ингредиентов рецептов.
+
+    Для каждого ингредиента хранится отсортированный массив
+    идентификаторов рецептов, в которые он входит, а для каждого
+    рецепта — количество его ингредиентов.
+
+    Attributes:
+        version (int): Версия рецептов, из которой построен индекс.
+    """
+    __slots__ = ('version', '_postings', '_sizes')
+
+    def __init__(self, version, rows):
+        postings = defaultdict(list)
+        sizes = Counter()
+        for recipe_id, ingredient_id in rows:
+            postings[ingredient_id].append(recipe_id)
+            sizes[recipe_id] += 1
+        self.version = version
+        self._postings = {ingredient_id: array('q', sorted(recipe_ids))
+                          for ingredient_id, recipe_ids in postings.items()}
+        self._sizes = dict(sizes)
+
+    def search(self, ingredient_ids, mode=INCLUDE_ALL, limit=None):
+        """
+        Ищет рецепты по набору ингредиентов.
+
+        Режимы:
+            all — рецепты, содержащие все указанные ингредиенты;
+            any — рецепты, содержащие хотя бы один из них;
+            subset — рецепты, все ингредиенты которых входят в набор.
+
+        Рецепты упорядочены по покрытию — доле ингредиентов рецепта,
+        входящих в набор, а при равном покрытии — от новых к старым.
+
+        Args:
+            ingredient_ids: Идентификаторы ингредиентов.
+            mode (str): Режим поиска.
+            limit (int | None): Максимальное количество результатов.
+
+        Returns:
+            list[tuple[int, float]]: Пары (идентификатор рецепта, покрытие).
+        """
+        sizes = self._sizes
+        postings = [self._postings.get(ingredient_id, ())
+                    for ingredient_id in set(ingredient_ids)]
+        if mode == INCLUDE_ALL:
+            postings.sort(key=len)
+            found = set(postings[0]) if postings else set()
+            for recipe_ids in postings[1:]:
+                found.intersection_update(recipe_ids)
+            total = len(postings)
+            candidates = ((-round(total / sizes[recipe_id], 2), -recipe_id)
+                          for recipe_id in found)
+        else:
+            matched = Counter()
+            for recipe_ids in postings:
+                matched.update(recipe_ids)
+            candidates = (
+                (-round(count / sizes[recipe_id], 2), -recipe_id)
+                for recipe_id, count in matched.items()
+                if mode == INCLUDE_ANY or count == sizes[recipe_id]
+            )
+        ranked = (heapq.nsmallest(limit, candidates) if limit is not None
+                  else sorted(candidates))
+        return [(-recipe_id, -coverage) for coverage, recipe_id in ranked]
+
+
+class VersionedIndex:
+    """
+    Индекс рецептов, закешированный в памяти процесса.
+
+    Индекс перестраивается при первом обращении после изменения версии
+    рецептов, которую обновляют сигналы сохранения и удаления рецептов
+    и их ингредиентов. Используется только без PostgreSQL, где поиск
+    выполняется по индексам базы данных.
+    """
+
+    def __init__(self, snapshot_class, rows):
+        self.snapshot_class = snapshot_class
+        self.rows = rows
+        self._snapshot = None
+        self._lock = Lock()
+
+    def snapshot(self):
+        """
+        Возвращает актуальный индекс.
+
+        Returns:
+            RecipeSearchSnapshot | RecipeIngredientSnapshot: Снимок индекса.
+        """
+        version = get_version(RECIPES_VERSION)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version != version:
+                snapshot = self.snapshot_class(version, self.rows())
+                self._snapshot = snapshot
+        return snapshot
+
+
+recipe_search_index = VersionedIndex(
+    RecipeSearchSnapshot,
+    lambda: Recipe.objects.order_by().values_list(
+        'pk', 'name', 'text'
+    ).iterator()
+)
+recipe_ingredient_index = VersionedIndex(
+    RecipeIngredientSnapshot,
+    lambda: AmountIngredient.objects.order_by().values_list(
+        'recipe_id', 'ingredient_id'
+    ).iterator()
+)
+
+
+def search_recipes(queryset, query):
+    """
+    Ищет рецепты по названию и описанию с ранжированием по релевантности.
+
+    В PostgreSQL используется полнотекстовый поиск с русской морфологией
+    по сохраненному поисковому вектору с GIN-индексом, в остальных базах
+    данных — обратный индекс в памяти. Рецепты с одинаковым рангом
+    упорядочены от новых к старым.
+
+    Args:
+        queryset: Исходный набор запросов рецептов.
+        query (str): Строка поиска.
+
+    Returns:
+        QuerySet: Найденные рецепты в порядке релевантности.
+    """
+    if connection.vendor == 'postgresql':
+        search_query = SearchQuery(query, config=SEARCH_CONFIG,
+                                   search_type='websearch')
+        return queryset.filter(search_vector=search_query).annotate(
+            rank=SearchRank(F('search_vector'), search_query)
+        ).order_by('-rank', '-created', '-id')
+    return _order_by_score(
+        queryset, recipe_search_index.snapshot().search(query).items()
+    )
+
+
+def _order_by_score(queryset, scores):
+    """
+    Отбирает рецепты с вычисленным рангом и упорядочивает по нему.
+
+    Рецепты группируются по рангу, поэтому выражение CASE содержит
+    по одному условию на каждое различное значение ранга.
+
+    Args:
+        queryset: Исходный набор запросов рецептов.
+        scores: Пары (идентификатор рецепта, ранг).
+
+    Returns:
+        QuerySet: Рецепты, упорядоченные по убыванию ранга, а при равном
+        ранге — от новых к старым.
+    """
+    ranks = defaultdict(list)
+    for pk, score in scores:
+        ranks[round(score, 2)].append(pk)
+    if not ranks:
+        return queryset.none()
+    return queryset.filter(
+        pk__in=[pk for ids in ranks.values() for pk in ids]
+    ).annotate(rank=Case(
+        *(When(pk__in=ids, then=Value(score)) for score, ids in ranks.items()),
+        output_field=FloatField()
+    )).order_by('-rank', '-created', '-id')
+
+
+def search_recipes_by_ingredients(queryset, ingredient_ids,
+                                  mode=INCLUDE_ALL):
+    """
+    Ищет рецепты по набору ингредиентов с ранжированием по покрытию.
+
+    В PostgreSQL поиск выполняется по массиву идентификаторов
+    ингредиентов рецепта с GIN-индексом, в остальных базах данных —
+    по обратному индексу в памяти, без соединений с таблицей количеств
+    ингредиентов. В выдачу попадает не больше
+    RECIPE_INGREDIENT_SEARCH_LIMIT лучших рецептов.
+
+    Args:
+        queryset: Исходный набор запросов рецептов.
+        ingredient_ids: Идентификаторы ингредиентов.
+        mode (str): Режим поиска: all, any или subset.
+
+    Returns:
+        QuerySet: Найденные рецепты в порядке убывания покрытия.
+    """
+    limit = settings.RECIPE_INGREDIENT_SEARCH_LIMIT
+    if connection.vendor == 'postgresql':
+        return _search_ingredient_ids(queryset, sorted(set(ingredient_ids)),
+                                      mode, limit)
+    scores = recipe_ingredient_index.snapshot().search(
+        ingredient_ids, mode, limit
+    )
+    return _order_by_score(queryset, scores)
+
+
+class IngredientCoverage(Func):
+    """
+    Доля ингредиентов рецепта, входящих в набор, округленная до сотых.
+
+    Выражение PostgreSQL над массивом идентификаторов ингредиентов
+    рецепта и массивом идентификаторов из запроса.
+    """
+    template = (
+        'round((SELECT count(*) FROM unnest(%(column)s) AS ingredient_id '
+        'WHERE ingredient_id = ANY(%(ingredients)s))::numeric '
+        '/ cardinality(%(column)s), 2)::float'
+    )
+    output_field = FloatField()
+
+    def __init__(self, column, ingredient_ids):
+        super().__init__(column, Value(
+            ingredient_ids, output_field=ArrayField(IntegerField())
+        ))
+
+    def as_sql(self, compiler, connection, **extra_context):
+        column, ingredients = self.get_source_expressions()
+        column_sql, column_params = compiler.compile(column)
+        ingredients_sql, ingredients_params = compiler.compile(ingredients)
+        sql = self.template % {'column': column_sql,
+                               'ingredients': ingredients_sql}
+        return sql, (*column_params, *ingredients_params, *column_params)
+
+
+def _search_ingredient_ids(queryset, ingredient_ids, mode, limit):
+    """
+    Ищет рецепты по массиву идентификаторов ингредиентов в PostgreSQL.
+
+    Режимы all, any и subset соответствуют операторам массивов @>, &&
+    и <@, которые поддерживает GIN-индекс. Ранг — покрытие, округленное
+    до сотых, как в индексе в памяти.
+
+    Args:
+        queryset: Исходный набор запросов рецептов.
+        ingredient_ids (list[int]): Идентификаторы ингредиентов.
+        mode (str): Режим поиска.
+        limit (int): Максимальное количество результатов.
+
+    Returns:
+        QuerySet: Найденные рецепты в порядке убывания покрытия.
+    """
+    lookup = {INCLUDE_ALL: 'contains', INCLUDE_ANY: 'overlap',
+              INCLUDE_SUBSET: 'contained_by'}[mode]
+    coverage = IngredientCoverage('ingredient_ids', ingredient_ids)
+    ordering = ('-rank', '-created', '-id')
+    found = queryset.filter(
+        ingredient_ids__len__gt=0, **{f'ingredient_ids__{lookup}':
+                                      ingredient_ids}
+    ).annotate(rank=coverage)
+    return found.filter(
+        pk__in=found.order_by(*ordering).values('pk')[:limit]
+    ).order_by(*ordering)
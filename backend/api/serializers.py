@@ -1,11 +1,15 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.urls import reverse
 from djoser.serializers import UserCreateSerializer, UserSerializer
 
-from recipes.models import (Tag, Ingredient, Recipe, Favorite, ShoppingCart,
-                            AmountIngredient)
-from users.models import Subscription
-from .fields import Base64ImageField
+from recipes.models import (Tag, Ingredient, Recipe, AmountIngredient,
+                            ShoppingListJob)
+from .fields import Base64ImageField, ImageRenditionsField
+from .cache import bump_recipe_cart_versions, recipe_cart_invalidation
+from .relations import get_user_relations
+from .search import recipe_ingredients_batch, update_ingredient_ids
 
 User = get_user_model()
 
@@ -42,16 +46,15 @@ class CustomUserSerializer(UserSerializer):
         """
         Проверяет, подписан ли текущий пользователь на данного автора.
 
+        Подписки пользователя загружаются один раз на запрос.
+
         Args:
             obj: Объект пользователя.
 
         Returns:
             bool: True, если подписан, иначе False.
         """
-        user = self.context.get('request').user
-        if user.is_anonymous:
-            return False
-        return Subscription.objects.filter(user=user, author=obj).exists()
+        return get_user_relations(self.context).is_subscribed(obj)
 
 
 class ShortRecipeSerializer(serializers.ModelSerializer):
@@ -59,10 +62,11 @@ class ShortRecipeSerializer(serializers.ModelSerializer):
     Краткий сериализатор для рецепта.
     """
     image = Base64ImageField()
+    images = ImageRenditionsField(source='*')
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'images', 'cooking_time')
 
 
 class SubscriptionSerializer(CustomUserSerializer):
@@ -70,25 +74,12 @@ class SubscriptionSerializer(CustomUserSerializer):
     Сериализатор для подписки, включающий рецепты автора и их количество.
     """
     recipes = ShortRecipeSerializer(read_only=True, many=True)
-    recipes_count = serializers.SerializerMethodField()
 
     class Meta:
         model = User
         fields = ('email', 'id', 'username', 'first_name', 'last_name',
                   'is_subscribed', 'recipes', 'recipes_count')
 
-    def get_recipes_count(self, obj):
-        """
-        Возвращает количество рецептов у автора.
-
-        Args:
-            obj: Объект пользователя.
-
-        Returns:
-            int: Количество рецептов.
-        """
-        return Recipe.objects.filter(author=obj).count()
-
     def get_is_subscribed(self, obj):
         """
         Всегда возвращает True для подтверждения подписки.
@@ -133,11 +124,12 @@ class RecipeSerializer(serializers.ModelSerializer):
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
     image = Base64ImageField()
+    images = ImageRenditionsField(source='*')
 
     class Meta:
         model = Recipe
         fields = ('id', 'tags', 'author', 'ingredients', 'is_favorited',
-                  'is_in_shopping_cart', 'name', 'image', 'text',
+                  'is_in_shopping_cart', 'name', 'image', 'images', 'text',
                   'cooking_time')
 
     def get_is_favorited(self, obj):
@@ -150,10 +142,7 @@ class RecipeSerializer(serializers.ModelSerializer):
         Returns:
             bool: True, если в избранном, иначе False.
         """
-        user = self.context.get('request').user
-        if user.is_anonymous:
-            return False
-        return Favorite.objects.filter(user=user, recipe=obj).exists()
+        return get_user_relations(self.context).is_favorited(obj)
 
     def get_is_in_shopping_cart(self, obj):
         """
@@ -165,36 +154,98 @@ class RecipeSerializer(serializers.ModelSerializer):
         Returns:
             bool: True, если в корзине покупок, иначе False.
         """
-        user = self.context.get('request').user
-        if user.is_anonymous:
-            return False
-        return ShoppingCart.objects.filter(user=user, recipe=obj).exists()
+        return get_user_relations(self.context).is_in_shopping_cart(obj)
+
+    def validate(self, attrs):
+        """
+        Проверяет теги и ингредиенты рецепта.
+
+        Все ингредиенты и теги проверяются на существование двумя
+        запросами, независимо от их количества.
+
+        Args:
+            attrs: Проверенные данные рецепта.
+
+        Returns:
+            dict: Данные рецепта с идентификаторами тегов и количествами
+            ингредиентов.
+
+        Raises:
+            serializers.ValidationError: Если теги или ингредиенты некорректны.
+        """
+        tags = self.initial_data.get('tags')
+        ingredients = self.initial_data.get('ingredients')
+        if not tags:
+            raise serializers.ValidationError(
+                {'tags': 'Укажите хотя бы один тег'}
+            )
+        if not ingredients:
+            raise serializers.ValidationError(
+                {'ingredients': 'Укажите хотя бы один ингредиент'}
+            )
+        try:
+            tags = {int(tag) for tag in tags}
+            amounts = {int(item['id']): int(item['amount'])
+                       for item in ingredients}
+        except (TypeError, KeyError, ValueError):
+            raise serializers.ValidationError(
+                {'ingredients': 'Неверный формат тегов или ингредиентов'}
+            )
+        if len(amounts) != len(ingredients):
+            raise serializers.ValidationError(
+                {'ingredients': 'Ингредиенты не должны повторяться'}
+            )
+        if not all(1 <= amount <= 32767 for amount in amounts.values()):
+            raise serializers.ValidationError(
+                {'ingredients': 'Количество ингредиента от 1 до 32767'}
+            )
+        if len(Ingredient.objects.in_bulk(amounts)) != len(amounts):
+            raise serializers.ValidationError(
+                {'ingredients': 'Указан несуществующий ингредиент'}
+            )
+        if Tag.objects.filter(pk__in=tags).count() != len(tags):
+            raise serializers.ValidationError(
+                {'tags': 'Указан несуществующий тег'}
+            )
+        attrs['tags'] = tags
+        attrs['ingredients'] = amounts
+        return attrs
 
     def create(self, validated_data):
         """
         Создает новый рецепт с тегами и ингредиентами.
 
+        Количества ингредиентов записываются одним bulk_create
+        в той же транзакции, что и рецепт.
+
         Args:
             validated_data: Данные для создания рецепта.
 
         Returns:
             Recipe: Созданный объект рецепта.
         """
-        tags = self.initial_data.pop('tags')
-        ingredients = self.initial_data.pop('ingredients')
-        recipe = Recipe.objects.create(**validated_data)
-        recipe.tags.set(tags)
-        for ingredient in ingredients:
-            amount = ingredient.pop('amount')
-            current_ingredient = Ingredient.objects.get(**ingredient)
-            AmountIngredient.objects.create(ingredient=current_ingredient,
-                                            recipe=recipe, amount=amount)
+        tags = validated_data.pop('tags')
+        amounts = validated_data.pop('ingredients')
+        with transaction.atomic():
+            recipe = Recipe.objects.create(**validated_data)
+            recipe.tags.set(tags)
+            AmountIngredient.objects.bulk_create(
+                AmountIngredient(recipe=recipe, ingredient_id=ingredient,
+                                 amount=amount)
+                for ingredient, amount in amounts.items()
+            )
+            update_ingredient_ids(Recipe.objects.filter(pk=recipe.pk))
         return recipe
 
     def update(self, instance, validated_data):
         """
         Обновляет существующий рецепт с новыми тегами и ингредиентами.
 
+        Текущие количества ингредиентов сравниваются с новыми: добавляются,
+        изменяются и удаляются только отличающиеся строки. Массив
+        ингредиентов и списки покупок обновляются один раз на рецепт,
+        а не сигналами отдельных строк.
+
         Args:
             instance: Объект рецепта для обновления.
             validated_data: Данные для обновления рецепта.
@@ -202,13 +253,66 @@ class RecipeSerializer(serializers.ModelSerializer):
         Returns:
             Recipe: Обновленный объект рецепта.
         """
-        tags = self.initial_data.get('tags')
-        ingredients = self.initial_data.get('ingredients')
-        recipe = Recipe.objects.create(**validated_data)
-        recipe.tags.set(tags)
-        for ingredient in ingredients:
-            amount = ingredient.pop('amount')
-            current_ingredient = Ingredient.objects.get(**ingredient)
-            AmountIngredient.objects.create(ingredient=current_ingredient,
-                                            recipe=recipe, amount=amount)
-        return recipe
+        tags = validated_data.pop('tags')
+        amounts = validated_data.pop('ingredients')
+        with (recipe_ingredients_batch(), recipe_cart_invalidation(),
+              transaction.atomic()):
+            for field, value in validated_data.items():
+                setattr(instance, field, value)
+            instance.save()
+            instance.tags.set(tags)
+            existing = {
+                item.ingredient_id: item
+                for item in AmountIngredient.objects.filter(recipe=instance)
+            }
+            created = [
+                AmountIngredient(recipe=instance, ingredient_id=ingredient,
+                                 amount=amount)
+                for ingredient, amount in amounts.items()
+                if ingredient not in existing
+            ]
+            updated = []
+            for ingredient, item in existing.items():
+                if ingredient in amounts and item.amount != amounts[ingredient]:
+                    item.amount = amounts[ingredient]
+                    updated.append(item)
+            removed = [item.pk for ingredient, item in existing.items()
+                       if ingredient not in amounts]
+            if created:
+                AmountIngredient.objects.bulk_create(created)
+            if updated:
+                AmountIngredient.objects.bulk_update(updated, ('amount',))
+            if removed:
+                AmountIngredient.objects.filter(pk__in=removed).delete()
+            if created or removed:
+                update_ingredient_ids(Recipe.objects.filter(pk=instance.pk))
+            if created or updated or removed:
+                bump_recipe_cart_versions(instance.pk)
+        return instance
+
+
+class ShoppingListJobSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор для задачи фонового формирования списка покупок.
+    """
+    download = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ShoppingListJob
+        fields = ('id', 'format', 'status', 'error', 'created', 'download')
+
+    def get_download(self, obj):
+        """
+        Возвращает ссылку на готовый документ.
+
+        Args:
+            obj: Объект задачи.
+
+        Returns:
+            str | None: Ссылка на загрузку или None, если документ не готов.
+        """
+        if obj.status != ShoppingListJob.DONE:
+            return None
+        return self.context['request'].build_absolute_uri(reverse(
+            'api:recipe-shopping-list-job-download', kwargs={'job_id': obj.pk}
+        ))
@@ -0,0 +1,56 @@
+from typing import NamedTuple
+
+from django.db.models import Sum
+
+from recipes.models import AmountIngredient
+
+
+class ShoppingListItem(NamedTuple):
+    """
+    Строка списка покупок.
+
+    Attributes:
+        name (str): Название ингредиента.
+        measurement_unit (str): Единица измерения ингредиента.
+        amount (int): Суммарное количество ингредиента.
+    """
+    name: str
+    measurement_unit: str
+    amount: int
+
+
+def shopping_list_queryset(user):
+    """
+    Возвращает агрегирующий запрос строк списка покупок пользователя.
+
+    Args:
+        user: Пользователь, для которого формируется список.
+
+    Returns:
+        QuerySet: Кортежи (название, единица измерения, количество).
+    """
+    return (
+        AmountIngredient.objects
+        .filter(recipe__in_shopping_carts__user=user)
+        .values_list('ingredient__name', 'ingredient__measurement_unit')
+        .annotate(total=Sum('amount'))
+        .order_by('ingredient__name', 'ingredient__measurement_unit')
+    )
+
+
+def get_shopping_list(user):
+    """
+    Собирает список покупок пользователя одним агрегирующим запросом.
+
+    Количества ингредиентов из всех рецептов корзины суммируются в базе
+    данных с группировкой по ингредиенту и единице измерения. Результат
+    общий для всех форматов выгрузки списка покупок.
+
+    Args:
+        user: Пользователь, для которого формируется список.
+
+    Returns:
+        tuple[ShoppingListItem]: Строки списка, упорядоченные по названию.
+    """
+    return tuple(ShoppingListItem(*row)
+                 for row in shopping_list_queryset(user))
@@ -0,0 +1,218 @@
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.core.signals import request_finished, request_started
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.models import (AmountIngredient, Favorite, Ingredient, Recipe,
+                            ShoppingCart, Tag)
+from users.models import Subscription
+from .cache import bump_cart_versions
+from .catalog import INGREDIENTS_VERSION, TAGS_VERSION
+from .conditional import USERS_VERSION
+from .counters import COUNTERS, change_counter
+from .feed import backfill_feed, fan_out_recipes, prune_feed
+from .images import has_renditions, schedule_renditions
+from .popularity import (POPULARITY_VERSION, change_popularity, score_weights,
+                         trend_contribution)
+from .relations import relations_version_name
+from .search import (RECIPES_VERSION, refresh_recipe_on_commit,
+                     update_ingredient_ids, update_search_vectors)
+from .versions import bump_version, close_version_scope, open_version_scope
+
+User = get_user_model()
+
+
+@receiver((post_save, post_delete), sender=ShoppingCart)
+def shopping_cart_changed(sender, instance, **kwargs):
+    """
+    Сбрасывает кеш списка покупок при изменении корзины.
+    """
+    bump_cart_versions((instance.user_id,))
+
+
+@receiver(request_started)
+def request_started_handler(sender, **kwargs):
+    """
+    Открывает область запроса, в которой версии данных читаются один раз.
+    """
+    open_version_scope()
+
+
+@receiver(request_finished)
+def request_finished_handler(sender, **kwargs):
+    """
+    Закрывает область версий данных запроса.
+    """
+    close_version_scope()
+
+
+def bump_version_on_commit(name):
+    """
+    Обновляет версию набора данных после фиксации транзакции.
+
+    Индексы в памяти и ETag ответов строятся по версии, поэтому она
+    не должна стать видна раньше, чем сами изменения.
+    """
+    transaction.on_commit(partial(bump_version, name))
+
+
+def bump_recipes_version():
+    """
+    Обновляет версию рецептов после фиксации транзакции.
+    """
+    bump_version_on_commit(RECIPES_VERSION)
+
+
+@receiver((post_save, post_delete), sender=Favorite)
+@receiver((post_save, post_delete), sender=ShoppingCart)
+@receiver((post_save, post_delete), sender=Subscription)
+def user_relations_changed(sender, instance, **kwargs):
+    """
+    Обновляет версию связей пользователя, от которой зависят его флаги
+    избранного, корзины и подписки в ответах.
+    """
+    bump_version_on_commit(relations_version_name(instance.user_id))
+
+
+@receiver((post_save, post_delete), sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    """
+    Обновляет версию пользователей при изменении профиля.
+
+    Сохранение только даты последнего входа профиль в ответах не меняет.
+    """
+    if update_fields is None or set(update_fields) - {'last_login'}:
+        bump_version_on_commit(USERS_VERSION)
+
+
+@receiver((post_save, post_delete), sender=AmountIngredient)
+def recipe_ingredients_changed(sender, instance, **kwargs):
+    """
+    Откладывает до фиксации транзакции пересчет массива ингредиентов
+    рецепта и сброс списков покупок с ним и индексов рецептов в памяти.
+    """
+    refresh_recipe_on_commit(instance.recipe_id)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def ingredients_changed(sender, **kwargs):
+    """
+    Сбрасывает снимок справочника ингредиентов при его изменении.
+    """
+    bump_version_on_commit(INGREDIENTS_VERSION)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tags_changed(sender, **kwargs):
+    """
+    Сбрасывает снимок справочника тегов при его изменении.
+    """
+    bump_version_on_commit(TAGS_VERSION)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_image_saved(sender, instance, **kwargs):
+    """
+    Отмечает готовность уменьшенных копий изображения рецепта
+    и создает в фоне копии нового изображения.
+    """
+    ready = bool(instance.image) and has_renditions(instance.image.name)
+    if ready != instance.renditions_ready:
+        Recipe.objects.filter(pk=instance.pk).update(renditions_ready=ready)
+        instance.renditions_ready = ready
+    if instance.image and not ready:
+        schedule_renditions(instance.image.name)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, created, **kwargs):
+    """
+    Обновляет поисковый вектор и массив ингредиентов рецепта и версию
+    рецептов, а новый рецепт добавляет в ленты подписчиков автора.
+    """
+    recipes = Recipe.objects.filter(pk=instance.pk)
+    update_search_vectors(recipes)
+    update_ingredient_ids(recipes)
+    bump_recipes_version()
+    if created:
+        fan_out_recipes((instance,))
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, **kwargs):
+    """
+    Обновляет версию рецептов после удаления рецепта.
+    """
+    bump_recipes_version()
+
+
+@receiver(post_save, sender=Subscription)
+def subscription_created(sender, instance, created, **kwargs):
+    """
+    Добавляет рецепты автора в ленту нового подписчика.
+    """
+    if created:
+        backfill_feed(instance.user_id, instance.author)
+
+
+@receiver(post_delete, sender=Subscription)
+def subscription_deleted(sender, instance, **kwargs):
+    """
+    Удаляет рецепты автора из ленты бывшего подписчика.
+    """
+    prune_feed(instance.user_id, instance.author_id)
+
+
+def _counter_receivers(relation, model, field):
+    """
+    Создает обработчики, изменяющие счетчик при добавлении и удалении строк.
+    """
+    def added(sender, instance, created, **kwargs):
+        if created:
+            change_counter(model, getattr(instance, f'{relation}_id'),
+                           field, 1)
+
+    def removed(sender, instance, **kwargs):
+        change_counter(model, getattr(instance, f'{relation}_id'), field, -1)
+
+    return added, removed
+
+
+for source, relation, model, field in COUNTERS:
+    added, removed = _counter_receivers(relation, model, field)
+    post_save.connect(added, sender=source, weak=False,
+                      dispatch_uid=f'{field}_added')
+    post_delete.connect(removed, sender=source, weak=False,
+                        dispatch_uid=f'{field}_removed')
+
+
+def _popularity_receivers(weight):
+    """
+    Создает обработчики, изменяющие популярность рецепта.
+
+    При удалении из рейтинга трендов вычитается вклад добавления
+    с учетом затухания с момента добавления.
+    """
+    def added(sender, instance, created, **kwargs):
+        if created:
+            change_popularity(instance.recipe_id, weight)
+            bump_version_on_commit(POPULARITY_VERSION)
+
+    def removed(sender, instance, **kwargs):
+        change_popularity(instance.recipe_id, -weight,
+                          -trend_contribution(weight, instance.created))
+        bump_version_on_commit(POPULARITY_VERSION)
+
+    return added, removed
+
+
+for source, weight in score_weights().items():
+    added, removed = _popularity_receivers(weight)
+    name = source._meta.model_name
+    post_save.connect(added, sender=source, weak=False,
+                      dispatch_uid=f'{name}_popularity_added')
+    post_delete.connect(removed, sender=source, weak=False,
+                        dispatch_uid=f'{name}_popularity_removed')
@@ -0,0 +1,325 @@
+import base64
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from recipes.models import (AmountIngredient, Favorite, Ingredient, Recipe,
+                            ShoppingCart, Tag)
+from users.models import Subscription
+from .images import run_renditions
+from .popularity import decay_trend_scores
+
+User = get_user_model()
+
+
+class RecipeListQueriesTest(APITestCase):
+    """
+    Количество запросов списка рецептов не зависит от размера страницы.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass',
+            first_name='Reader', last_name='Reader'
+        )
+        authors = [
+            User.objects.create_user(
+                username=f'author{i}', email=f'author{i}@example.com',
+                password='pass', first_name='Author', last_name=str(i)
+            )
+            for i in range(5)
+        ]
+        tags = [Tag.objects.create(name=f'tag{i}', color=f'#00000{i}',
+                                   slug=f'tag{i}') for i in range(3)]
+        ingredients = [
+            Ingredient.objects.create(name=f'ingredient{i}',
+                                      measurement_unit='г')
+            for i in range(10)
+        ]
+        for i in range(60):
+            recipe = Recipe.objects.create(
+                author=authors[i % len(authors)], name=f'recipe{i}',
+                text='text', cooking_time=10, image='recipes/recipe.png'
+            )
+            recipe.tags.set(tags[:i % len(tags) + 1])
+            AmountIngredient.objects.bulk_create(
+                AmountIngredient(recipe=recipe, ingredient=ingredient,
+                                 amount=i + 1)
+                for ingredient in ingredients[:i % 5 + 3]
+            )
+            if i % 2:
+                Favorite.objects.create(user=cls.user, recipe=recipe)
+            if i % 3:
+                ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+        Subscription.objects.create(user=cls.user, author=authors[0])
+
+    def count_queries(self, limit):
+        """
+        Возвращает количество запросов к базе для страницы рецептов.
+
+        Перед замером кеш очищается, чтобы количество рецептов
+        подсчитывалось при каждом запросе.
+        """
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('api:recipe-list'),
+                                       {'limit': limit})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), limit)
+        return len(queries)
+
+    def assert_constant_queries(self):
+        self.client.get(reverse('api:recipe-list'))
+        self.assertEqual(self.count_queries(5), self.count_queries(50))
+
+    def test_anonymous_queries_do_not_depend_on_page_size(self):
+        self.assert_constant_queries()
+
+    def test_authenticated_queries_do_not_depend_on_page_size(self):
+        self.client.force_authenticate(self.user)
+        self.assert_constant_queries()
+
+
+class PaginationCountTest(APITestCase):
+    """
+    Закешированное количество записей учитывает изменения данных.
+    """
+
+    def test_favorites_count_follows_relations(self):
+        user = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass',
+            first_name='Reader', last_name='Reader'
+        )
+        for i in range(3):
+            recipe = Recipe.objects.create(
+                author=user, name=f'recipe{i}', text='text', cooking_time=10,
+                image='recipes/recipe.png'
+            )
+            Favorite.objects.create(user=user, recipe=recipe)
+        self.client.force_authenticate(user)
+        url = reverse('api:recipe-list')
+        response = self.client.get(url, {'is_favorited': 1})
+        self.assertEqual(response.data['count'], 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(
+                reverse('api:recipe-favorite', args=(recipe.pk,))
+            )
+        response = self.client.get(url, {'is_favorited': 1})
+        self.assertEqual(response.data['count'], 2)
+
+
+class FeedTest(APITestCase):
+    """
+    Лента подписок с рецептами популярных авторов.
+    """
+
+    @override_settings(FEED_FANOUT_LIMIT=2)
+    def test_recipes_stay_when_author_drops_below_limit(self):
+        author, first, second = (
+            User.objects.create_user(
+                username=name, email=f'{name}@example.com', password='pass',
+                first_name=name, last_name=name
+            )
+            for name in ('author', 'first', 'second')
+        )
+        Subscription.objects.create(user=first, author=author)
+        Subscription.objects.create(user=second, author=author)
+        recipe = Recipe.objects.create(
+            author=author, name='recipe', text='text', cooking_time=10,
+            image='recipes/recipe.png'
+        )
+        Subscription.objects.get(user=second).delete()
+        self.client.force_authenticate(first)
+        response = self.client.get(reverse('api:recipe-feed'))
+        self.assertEqual([item['id'] for item in response.data['results']],
+                         [recipe.pk])
+
+
+class RecipeWriteQueriesTest(APITestCase):
+    """
+    Количество запросов удаления рецепта не зависит от числа ингредиентов.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='author', email='author@example.com', password='pass',
+            first_name='Author', last_name='Author'
+        )
+        cls.ingredients = [
+            Ingredient.objects.create(name=f'ingredient{i}',
+                                      measurement_unit='г')
+            for i in range(30)
+        ]
+
+    def count_delete_queries(self, size):
+        recipe = Recipe.objects.create(
+            author=self.user, name='recipe', text='text', cooking_time=10,
+            image='recipes/recipe.png'
+        )
+        AmountIngredient.objects.bulk_create(
+            AmountIngredient(recipe=recipe, ingredient=ingredient, amount=1)
+            for ingredient in self.ingredients[:size]
+        )
+        self.client.force_authenticate(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.delete(
+                    reverse('api:recipe-detail', args=(recipe.pk,))
+                )
+        self.assertEqual(response.status_code, 204)
+        return len(queries)
+
+    def test_delete_queries_do_not_depend_on_ingredients(self):
+        self.count_delete_queries(1)
+        self.assertEqual(self.count_delete_queries(3),
+                         self.count_delete_queries(30))
+
+
+class ConditionalRequestsTest(APITestCase):
+    """
+    Условные запросы к рецептам и справочникам.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass',
+            first_name='Reader', last_name='Reader'
+        )
+        cls.tag = Tag.objects.create(name='tag', color='#000000', slug='tag')
+        Ingredient.objects.create(name='salt', measurement_unit='г')
+        cls.recipe = Recipe.objects.create(
+            author=cls.user, name='recipe', text='text', cooking_time=10,
+            image='recipes/recipe.png'
+        )
+        cls.recipe.tags.set((cls.tag,))
+
+    def get(self, url, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(url, **headers)
+
+    def test_not_modified_skips_serialization(self):
+        url = reverse('api:recipe-list')
+        etag = self.get(url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.get(url, etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_user_variants_do_not_collide(self):
+        url = reverse('api:recipe-detail', args=(self.recipe.pk,))
+        etag = self.get(url)['ETag']
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.get(url, etag).status_code, 200)
+        etag = self.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorite.objects.create(user=self.user, recipe=self.recipe)
+        response = self.get(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['is_favorited'])
+
+    def test_versions_bumped_by_other_processes_invalidate(self):
+        url = reverse('api:ingredient-list')
+        etag = self.get(url)['ETag']
+        with tempfile.NamedTemporaryFile('w', suffix='.csv',
+                                         delete=False) as file:
+            file.write('pepper,г\n')
+        self.addCleanup(os.remove, file.name)
+        call_command('load_ingredients', file.name, stdout=io.StringIO())
+        cache.clear()
+        response = self.get(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('pepper', response.content.decode())
+
+
+class CursorPaginationTest(APITestCase):
+    """
+    Постраничная выдача рецептов по курсору.
+    """
+
+    def test_malformed_cursor_returns_not_found(self):
+        cursor = base64.urlsafe_b64encode(
+            json.dumps(['garbage', 1]).encode()
+        ).decode()
+        response = self.client.get(reverse('api:recipe-list'),
+                                   {'cursor': cursor})
+        self.assertEqual(response.status_code, 404)
+
+
+class RenditionsTaskTest(SimpleTestCase):
+    """
+    Фоновое создание уменьшенных копий изображения.
+    """
+
+    def test_errors_are_logged(self):
+        with self.assertLogs('api.images', 'ERROR') as logs:
+            run_renditions('recipes/missing.png')
+        self.assertIn('recipes/missing.png', logs.output[0])
+
+
+class LoadIngredientsTest(APITestCase):
+    """
+    Загрузка справочника ингредиентов командой load_ingredients.
+    """
+
+    def load(self, content):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv',
+                                         delete=False) as file:
+            file.write(content)
+        self.addCleanup(os.remove, file.name)
+        call_command('load_ingredients', file.name, stdout=io.StringIO())
+
+    def test_blank_rows_are_skipped(self):
+        self.load('salt,г\n\n , \npepper,г\n')
+        self.assertEqual(Ingredient.objects.count(), 2)
+
+    def test_malformed_row_reports_line(self):
+        with self.assertRaisesMessage(CommandError, 'Строка 2'):
+            self.load('salt,г\npepper\n')
+
+
+class TrendScoreTest(APITestCase):
+    """
+    Рейтинг трендов при удалении рецепта из избранного.
+    """
+
+    def test_removal_subtracts_decayed_contribution(self):
+        author, old, new = (
+            User.objects.create_user(
+                username=name, email=f'{name}@example.com', password='pass',
+                first_name=name, last_name=name
+            )
+            for name in ('author', 'old', 'new')
+        )
+        recipe = Recipe.objects.create(
+            author=author, name='recipe', text='text', cooking_time=10,
+            image='recipes/recipe.png'
+        )
+        favorite = Favorite.objects.create(user=old, recipe=recipe)
+        Favorite.objects.filter(pk=favorite.pk).update(
+            created=timezone.now()
+            - timedelta(seconds=settings.TRENDING_HALF_LIFE)
+        )
+        decay_trend_scores(0.5)
+        Favorite.objects.create(user=new, recipe=recipe)
+        Favorite.objects.get(user=old).delete()
+        recipe.refresh_from_db()
+        self.assertAlmostEqual(recipe.trend_score,
+                               settings.POPULARITY_FAVORITE_WEIGHT, places=3)
+        self.assertEqual(recipe.popularity,
+                         settings.POPULARITY_FAVORITE_WEIGHT)
@@ -0,0 +1,264 @@
+import json
+import posixpath
+from collections import Counter
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+from recipes.models import AmountIngredient, Ingredient, Recipe, Tag
+from .counters import change_counter
+from .feed import fan_out_recipes
+from .fields import Base64ImageField
+from .images import has_renditions, schedule_renditions
+from .search import (RECIPES_VERSION, update_ingredient_ids,
+                     update_search_vectors)
+from .versions import bump_version
+
+User = get_user_model()
+
+BATCH_SIZE = 500
+
+
+def export_recipes(queryset, chunk_size=BATCH_SIZE):
+    """
+    Выгружает рецепты в формате NDJSON.
+
+    Рецепты читаются из базы данных частями через iterator(), поэтому
+    потребление памяти не зависит от их количества.
+
+    Args:
+        queryset: Набор запросов выгружаемых рецептов.
+        chunk_size (int): Количество рецептов в одной части.
+
+    Yields:
+        bytes: Строка NDJSON с одним рецептом.
+    """
+    queryset = queryset.select_related('author').prefetch_related(
+        'tags',
+        Prefetch('amount_ingredients',
+                 queryset=AmountIngredient.objects.select_related('ingredient'))
+    ).order_by('pk')
+    for recipe in queryset.iterator(chunk_size=chunk_size):
+        item = {
+            'id': recipe.pk,
+            'author': recipe.author.email,
+            'name': recipe.name,
+            'text': recipe.text,
+            'cooking_time': recipe.cooking_time,
+            'image': recipe.image.name,
+            'tags': [tag.slug for tag in recipe.tags.all()],
+            'ingredients': [
+                {'name': amount.ingredient.name,
+                 'measurement_unit': amount.ingredient.measurement_unit,
+                 'amount': amount.amount}
+                for amount in recipe.amount_ingredients.all()
+            ],
+        }
+        yield json.dumps(item, ensure_ascii=False).encode() + b'\n'
+
+
+def _image(value):
+    """
+    Возвращает изображение рецепта по ссылке на файл или data URI.
+
+    Ссылаться можно только на изображения рецептов: путь должен лежать
+    в каталоге загрузки поля image.
+    """
+    if not isinstance(value, str) or not value:
+        raise serializers.ValidationError('Укажите изображение')
+    if value.startswith('data:'):
+        try:
+            return Base64ImageField().to_internal_value(value)
+        except DjangoValidationError as error:
+            raise serializers.ValidationError(error.messages)
+    path = posixpath.normpath(value)
+    if (path != value
+            or not path.startswith(Recipe._meta.get_field('image').upload_to)):
+        raise serializers.ValidationError(
+            f'Файл {value} не является изображением рецепта'
+        )
+    if not default_storage.exists(value):
+        raise serializers.ValidationError(f'Файл {value} не найден')
+    return value
+
+
+def _decode(line):
+    """
+    Разбирает одну строку NDJSON.
+    """
+    try:
+        item = json.loads(line)
+    except ValueError:
+        raise serializers.ValidationError('Некорректный JSON')
+    if not isinstance(item, dict):
+        raise serializers.ValidationError('Ожидается объект рецепта')
+    return item
+
+
+def _parse(item, tags, authors, default_author):
+    """
+    Проверяет рецепт из строки NDJSON и возвращает его данные.
+    """
+    name, text = item.get('name'), item.get('text')
+    if not isinstance(name, str) or not 0 < len(name) <= 200:
+        raise serializers.ValidationError('Некорректное название')
+    if not isinstance(text, str) or not text:
+        raise serializers.ValidationError('Некорректное описание')
+    cooking_time = item.get('cooking_time')
+    if not isinstance(cooking_time, int) or not 1 <= cooking_time <= 32767:
+        raise serializers.ValidationError('Некорректное время приготовления')
+    author = default_author
+    if author is None:
+        author = authors.get(item.get('author'))
+        if author is None:
+            raise serializers.ValidationError('Автор не найден')
+    tag_ids = []
+    for slug in item.get('tags') or ():
+        if slug not in tags:
+            raise serializers.ValidationError(f'Тег {slug} не найден')
+        tag_ids.append(tags[slug])
+    ingredients = item.get('ingredients')
+    if not isinstance(ingredients, list) or not ingredients:
+        raise serializers.ValidationError('Укажите ингредиенты')
+    amounts = {}
+    for ingredient in ingredients:
+        try:
+            key = (ingredient['name'], ingredient['measurement_unit'])
+            amount = int(ingredient['amount'])
+        except (TypeError, KeyError, ValueError):
+            raise serializers.ValidationError('Некорректный ингредиент')
+        if key in amounts or not 1 <= amount <= 32767:
+            raise serializers.ValidationError(
+                f'Некорректный ингредиент {key[0]}'
+            )
+        amounts[key] = amount
+    recipe = Recipe(author_id=author, name=name, text=text,
+                    cooking_time=cooking_time, image=item.get('image'))
+    return recipe, tag_ids, amounts
+
+
+def _import_batch(batch, tags, default_author):
+    """
+    Проверяет и сохраняет одну пачку рецептов.
+
+    Returns:
+        list[dict]: Результаты по каждой строке пачки.
+    """
+    results, items, valid = [], [], []
+    for number, line in batch:
+        try:
+            items.append((number, _decode(line)))
+        except serializers.ValidationError as error:
+            results.append({'line': number, 'status': 'error',
+                            'errors': error.detail})
+    authors = {}
+    if default_author is None:
+        emails = {item.get('author') for _, item in items}
+        authors = dict(User.objects.filter(email__in=emails - {None})
+                       .values_list('email', 'pk'))
+    for number, item in items:
+        try:
+            valid.append((number, *_parse(item, tags, authors,
+                                          default_author)))
+        except serializers.ValidationError as error:
+            results.append({'line': number, 'status': 'error',
+                            'errors': error.detail})
+    if not valid:
+        return sorted(results, key=lambda result: result['line'])
+    names = {name for *_, amounts in valid for name, _ in amounts}
+    ingredients = {
+        (name, unit): pk for pk, name, unit in Ingredient.objects.filter(
+            name__in=names
+        ).values_list('pk', 'name', 'measurement_unit')
+    }
+    resolved = []
+    for number, recipe, tag_ids, amounts in valid:
+        missing = [name for name, unit in amounts
+                   if (name, unit) not in ingredients]
+        if missing:
+            results.append({'line': number, 'status': 'error',
+                            'errors': [f'Ингредиент {name} не найден'
+                                       for name in missing]})
+            continue
+        try:
+            image = _image(recipe.image.name)
+        except serializers.ValidationError as error:
+            results.append({'line': number, 'status': 'error',
+                            'errors': error.detail})
+            continue
+        recipe.image = image
+        recipe.renditions_ready = (isinstance(image, str)
+                                   and has_renditions(image))
+        resolved.append((number, recipe, tag_ids, amounts))
+    if not resolved:
+        return sorted(results, key=lambda result: result['line'])
+    with transaction.atomic():
+        recipes = Recipe.objects.bulk_create(
+            recipe for _, recipe, _, _ in resolved
+        )
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe_id=recipe.pk, tag_id=tag_id)
+            for recipe, (_, _, tag_ids, _) in zip(recipes, resolved)
+            for tag_id in set(tag_ids)
+        )
+        AmountIngredient.objects.bulk_create(
+            AmountIngredient(recipe_id=recipe.pk,
+                             ingredient_id=ingredients[key], amount=amount)
+            for recipe, (_, _, _, amounts) in zip(recipes, resolved)
+            for key, amount in amounts.items()
+        )
+        created = Counter(recipe.author_id for recipe in recipes)
+        for author_id, count in created.items():
+            change_counter(User, author_id, 'recipes_count', count)
+        imported = Recipe.objects.filter(
+            pk__in=[recipe.pk for recipe in recipes]
+        )
+        update_search_vectors(imported)
+        update_ingredient_ids(imported)
+        fan_out_recipes(recipes)
+        for image in {recipe.image.name for recipe in recipes
+                      if not recipe.renditions_ready}:
+            schedule_renditions(image)
+    bump_version(RECIPES_VERSION)
+    results.extend({'line': number, 'status': 'created', 'id': recipe.pk}
+                   for recipe, (number, *_) in zip(recipes, resolved))
+    return sorted(results, key=lambda result: result['line'])
+
+
+def import_recipes(lines, author=None, batch_size=BATCH_SIZE):
+    """
+    Загружает рецепты из потока NDJSON.
+
+    Строки проверяются и сохраняются пачками: ингредиенты пачки
+    находятся одним запросом, рецепты, теги и количества ингредиентов
+    записываются через bulk_create в отдельной транзакции на пачку.
+    Так как bulk_create не отправляет сигналы, счетчики рецептов авторов
+    увеличиваются явно, одним запросом на автора, а поисковые векторы
+    пачки пересчитываются одним запросом, а рецепты добавляются в ленты
+    подписчиков авторов. Для изображений без уменьшенных копий копии
+    создаются в фоне после фиксации пачки.
+    Ошибка в одной строке не мешает загрузке остальных.
+
+    Args:
+        lines: Итерируемые строки NDJSON (str или bytes).
+        author: Автор всех рецептов. Если не указан, автор берется
+            из поля author каждой строки по email.
+        batch_size (int): Количество строк в одной пачке.
+
+    Yields:
+        bytes: Строка NDJSON с результатом обработки одной строки.
+    """
+    tags = dict(Tag.objects.values_list('slug', 'pk'))
+    author = author.pk if author is not None else None
+    numbered = (
+        (number, line) for number, line in enumerate(lines, 1)
+        if line.strip()
+    )
+    while batch := list(islice(numbered, batch_size)):
+        for result in _import_batch(batch, tags, author):
+            yield json.dumps(result, ensure_ascii=False).encode() + b'\n'
@@ -0,0 +1,116 @@
+import time
+from threading import local
+
+from django.db.models import BigIntegerField, F, Value
+from django.db.models.functions import Greatest
+
+from .models import DataVersion
+
+_state = local()
+
+
+def open_version_scope():
+    """
+    Начинает область запроса, в которой версии читаются из базы один раз.
+
+    Все обращения к версии в пределах запроса видят одно и то же
+    значение, поэтому снимки и валидаторы ответа согласованы между собой.
+    """
+    _state.versions = {}
+
+
+def close_version_scope():
+    """
+    Завершает область запроса, открытую open_version_scope.
+    """
+    _state.versions = None
+
+
+def get_versions(names):
+    """
+    Возвращает версии нескольких наборов данных одним запросом.
+
+    Версии хранятся в базе данных, поэтому одинаковы для всех процессов.
+    В области запроса уже прочитанные версии берутся из памяти.
+    Отсутствующие версии создаются.
+
+    Args:
+        names: Имена наборов данных.
+
+    Returns:
+        dict: Версии по именам наборов данных, в порядке имен.
+    """
+    names = list(dict.fromkeys(names))
+    scope = getattr(_state, 'versions', None)
+    found = {} if scope is None else {
+        name: scope[name] for name in names if name in scope
+    }
+    wanted = [name for name in names if name not in found]
+    if wanted:
+        found.update(DataVersion.objects.filter(name__in=wanted)
+                     .values_list('name', 'value'))
+    missing = [name for name in names if name not in found]
+    if missing:
+        version = time.time_ns()
+        DataVersion.objects.bulk_create(
+            (DataVersion(name=name, value=version) for name in missing),
+            ignore_conflicts=True
+        )
+        found.update(DataVersion.objects.filter(name__in=missing)
+                     .values_list('name', 'value'))
+    if scope is not None:
+        scope.update(found)
+    return {name: found[name] for name in names}
+
+
+def get_version(name):
+    """
+    Возвращает текущую версию именованного набора данных.
+
+    Args:
+        name (str): Имя набора данных.
+
+    Returns:
+        int: Версия — время последнего изменения в наносекундах.
+    """
+    return get_versions((name,))[name]
+
+
+def bump_versions(names):
+    """
+    Обновляет версии нескольких наборов данных.
+
+    Версия становится равной текущему времени, но не меньше предыдущей
+    версии плюс один, поэтому всегда меняется, даже если часы процессов
+    расходятся.
+
+    Args:
+        names: Имена наборов данных.
+    """
+    names = set(names)
+    if not names:
+        return
+    scope = getattr(_state, 'versions', None)
+    if scope is not None:
+        for name in names:
+            scope.pop(name, None)
+    version = time.time_ns()
+    updated = DataVersion.objects.filter(name__in=names).update(
+        value=Greatest(F('value') + 1,
+                       Value(version, output_field=BigIntegerField()))
+    )
+    if updated < len(names):
+        DataVersion.objects.bulk_create(
+            (DataVersion(name=name, value=version) for name in names),
+            ignore_conflicts=True
+        )
+
+
+def bump_version(name):
+    """
+    Обновляет версию набора данных.
+
+    Args:
+        name (str): Имя набора данных.
+    """
+    bump_versions((name,))
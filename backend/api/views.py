@@ -1,36 +1,96 @@
-from collections import defaultdict
-from io import BytesIO
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Prefetch, Window
+from django.db.models.functions import RowNumber
 from rest_framework import viewsets
-from rest_framework import exceptions
+from rest_framework import exceptions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from djoser.views import UserViewSet
 
-from recipes.models import Tag, Ingredient, Recipe, Favorite, ShoppingCart
+from recipes.models import (Tag, Ingredient, Recipe, Favorite, ShoppingCart,
+                            ShoppingListJob)
 from users.models import Subscription
 from .serializers import (SubscriptionSerializer, TagSerializer,
                           IngredientSerializer, RecipeSerializer,
-                          ShortRecipeSerializer)
+                          ShortRecipeSerializer, ShoppingListJobSerializer)
 from .permissions import IsAuthorOrStuffOrReadOnly, IsAdminOrReadOnly
-from .pagination import LimitedPageNumberPagination
+from .pagination import CursorPaginationMixin, LimitedPageNumberPagination
+from .relations import UserRelationsMixin, relations_version_name
 from .filters import IngredientFilter, RecipeFilter
+from .services import get_shopping_list
+from .cache import get_shopping_list_document
+from .renderers import SHOPPING_LIST_RENDERERS
+from .jobs import RENDERERS, enqueue_shopping_list
+from .catalog import (INGREDIENTS_VERSION, TAGS_VERSION, ingredient_catalog,
+                      tag_catalog)
+from .transfer import export_recipes, import_recipes
+from .feed import feed_queryset
+from .popularity import POPULARITY_VERSION, RECIPE_ORDERINGS
+from .conditional import (USERS_VERSION, conditional, make_validators,
+                          timestamp)
+from .search import RECIPES_VERSION
+from .images import RENDITIONS_VERSION
 
 User = get_user_model()
 
 
-class CustomUserViewSet(UserViewSet):
+class CustomUserViewSet(UserRelationsMixin, CursorPaginationMixin,
+                        UserViewSet):
     """
     Кастомное представление для пользователей, включая подписки и управление ими.
     """
     pagination_class = LimitedPageNumberPagination
 
+    @property
+    def cursor_ordering(self):
+        """
+        Ключ сортировки для пагинации по курсору.
+
+        Подписки упорядочены по времени оформления, то есть
+        по идентификатору подписки.
+        """
+        if self.action == 'subscriptions':
+            return ('-subscription_id',)
+        return ('-id',)
+
+    def get_count_versions(self):
+        """
+        Возвращает версии данных, от которых зависит количество
+        пользователей в списке.
+
+        Список подписок зависит от связей текущего пользователя.
+        """
+        versions = [USERS_VERSION]
+        if self.action == 'subscriptions':
+            versions.append(relations_version_name(self.request.user.pk))
+        return versions
+
+    def get_authors_queryset(self):
+        """
+        Возвращает авторов с количеством рецептов и последними рецептами.
+
+        Количество рецептов хранится в поле recipes_count, а последние рецепты
+        каждого автора с учетом параметра recipes_limit загружаются одним
+        запросом с оконной функцией.
+
+        Returns:
+            QuerySet: Набор запросов авторов.
+        """
+        recipes = Recipe.objects.all()
+        limit = self.request.query_params.get('recipes_limit', '')
+        if limit.isdigit():
+            recipes = recipes.annotate(row_number=Window(
+                RowNumber(), partition_by=F('author_id'),
+                order_by=(F('created').desc(), F('id').desc())
+            )).filter(row_number__lte=int(limit))
+        return User.objects.prefetch_related(
+            Prefetch('recipes', queryset=recipes)
+        )
+
     @action(['get'], detail=False, permission_classes=(IsAuthenticated,))
     def subscriptions(self, request):
         """
@@ -42,12 +102,17 @@ class CustomUserViewSet(UserViewSet):
         Returns:
             Response: Ответ с сериализованными данными подписок.
         """
-        queryset = User.objects.filter(in_subscriptions__user=request.user)
+        queryset = self.get_authors_queryset().filter(
+            in_subscriptions__user=request.user
+        ).annotate(
+            subscription_id=F('in_subscriptions__id')
+        ).order_by('-subscription_id')
         page = self.paginate_queryset(queryset)
         serializer = SubscriptionSerializer(page, many=True)
         return self.get_paginated_response(serializer.data)
 
     @action(['post'], detail=True, permission_classes=(IsAuthenticated,))
+    @transaction.atomic
     def subscribe(self, request, *args, **kwargs):
         """
         Подписывается на указанного пользователя.
@@ -64,7 +129,7 @@ class CustomUserViewSet(UserViewSet):
             exceptions.NotFound: Если пользователь не найден.
         """
         try:
-            author = User.objects.get(pk=kwargs.get('id'))
+            author = self.get_authors_queryset().get(pk=kwargs.get('id'))
         except User.DoesNotExist:
             raise exceptions.NotFound
         Subscription.objects.get_or_create(user=request.user, author=author)
@@ -72,6 +137,7 @@ class CustomUserViewSet(UserViewSet):
         return Response(serializer.data)
 
     @subscribe.mapping.delete
+    @transaction.atomic
     def unsubscribe(self, request, *args, **kwargs):
         """
         Отписывается от указанного пользователя.
@@ -89,7 +155,7 @@ class CustomUserViewSet(UserViewSet):
             exceptions.ParseError: Если пользователь не подписан.
         """
         try:
-            author = User.objects.get(pk=kwargs.get('id'))
+            author = self.get_authors_queryset().get(pk=kwargs.get('id'))
         except User.DoesNotExist:
             raise exceptions.NotFound
         try:
@@ -104,16 +170,106 @@ class CustomUserViewSet(UserViewSet):
         return Response(serializer.data)
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class CatalogViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Представление для справочников, отдающее JSON из снимка в памяти.
+
+    Запросы в формате JSON обслуживаются без обращения к базе данных
+    и без сериализации, остальные форматы обрабатываются как обычно.
+    ETag и дата изменения ответа вычисляются по версии справочника.
+    """
+    catalog = None
+
+    def get_validators(self, request, *args, **kwargs):
+        """
+        Возвращает валидаторы ответа по версии справочника.
+
+        Args:
+            request: Текущий запрос.
+
+        Returns:
+            tuple: ETag и дата изменения.
+        """
+        return make_validators(request, (self.catalog.version_name,))
+
+    def get_catalog_content(self, request, snapshot):
+        """
+        Возвращает JSON списка объектов из снимка справочника.
+
+        Args:
+            request: Текущий запрос.
+            snapshot: Снимок справочника.
+
+        Returns:
+            bytes | None: JSON или None, если запрос нужно обработать
+            обычным образом.
+        """
+        return snapshot.content
+
+    @conditional
+    def list(self, request, *args, **kwargs):
+        """
+        Возвращает список объектов справочника.
+
+        JSON отдается готовым из снимка справочника, остальные форматы
+        и некорректные параметры обрабатываются сериализатором.
+
+        Args:
+            request: Текущий запрос.
+            args: Дополнительные аргументы.
+            kwargs: Дополнительные аргументы.
+
+        Returns:
+            HttpResponse | Response: Ответ со списком объектов.
+        """
+        if request.accepted_renderer.format == 'json':
+            content = self.get_catalog_content(request,
+                                               self.catalog.snapshot())
+            if content is not None:
+                return HttpResponse(content, content_type='application/json')
+        return super().list(request, *args, **kwargs)
+
+    @conditional
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Возвращает объект справочника.
+
+        JSON объекта отдается готовым из снимка справочника.
+
+        Args:
+            request: Текущий запрос.
+            args: Дополнительные аргументы.
+            kwargs: Параметры адреса, pk — идентификатор объекта.
+
+        Returns:
+            HttpResponse | Response: Ответ с объектом.
+
+        Raises:
+            exceptions.NotFound: Если объекта нет в справочнике.
+        """
+        if request.accepted_renderer.format == 'json':
+            try:
+                pk = int(kwargs.get('pk'))
+            except (TypeError, ValueError):
+                raise exceptions.NotFound
+            content = self.catalog.snapshot().get(pk)
+            if content is None:
+                raise exceptions.NotFound
+            return HttpResponse(content, content_type='application/json')
+        return super().retrieve(request, *args, **kwargs)
+
+
+class TagViewSet(CatalogViewSet):
     """
     Представление для тегов, доступное только для чтения.
     """
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (IsAdminOrReadOnly,)
+    catalog = tag_catalog
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(CatalogViewSet):
     """
     Представление для ингредиентов, доступное только для чтения.
     """
@@ -121,9 +277,35 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = IngredientSerializer
     permission_classes = (IsAdminOrReadOnly,)
     filterset_class = IngredientFilter
+    catalog = ingredient_catalog
 
+    def get_catalog_content(self, request, snapshot):
+        """
+        Возвращает JSON ингредиентов с учетом поиска по имени и лимита.
 
-class RecipeViewSet(viewsets.ModelViewSet):
+        Args:
+            request: Текущий запрос.
+            snapshot: Снимок справочника.
+
+        Returns:
+            bytes | None: JSON или None, если параметры некорректны.
+        """
+        name = request.query_params.get('name')
+        limit = request.query_params.get('limit')
+        if limit is not None:
+            if not limit.isdigit() or int(limit) < 1:
+                return None
+            limit = int(limit)
+        if not name:
+            if limit is None:
+                return snapshot.content
+            return snapshot.render(range(min(limit, len(snapshot))))
+        prefix, substring = snapshot.search(name, limit)
+        return snapshot.render(prefix + substring)
+
+
+class RecipeViewSet(UserRelationsMixin, CursorPaginationMixin,
+                    viewsets.ModelViewSet):
     """
     Представление для рецептов с возможностью управления, фильтрации и пагинации.
     """
@@ -132,6 +314,119 @@ class RecipeViewSet(viewsets.ModelViewSet):
     permission_classes = (IsAuthorOrStuffOrReadOnly,)
     pagination_class = LimitedPageNumberPagination
     filterset_class = RecipeFilter
+    conditional_vary = ('Authorization',)
+
+    @property
+    def cursor_ordering(self):
+        """
+        Ключ сортировки для пагинации по курсору.
+
+        Лента упорядочена по дате публикации из записей ленты,
+        параметр ordering задает сортировку по популярности. Результаты
+        поиска по тексту и по ингредиентам упорядочены по релевантности,
+        которую нельзя выразить ключом курсора, поэтому для них ключа нет.
+        """
+        params = self.request.query_params
+        ordering = params.get('ordering')
+        if ordering in RECIPE_ORDERINGS:
+            return RECIPE_ORDERINGS[ordering]
+        if params.get('search') or params.get('ingredients'):
+            return None
+        if self.action == 'feed':
+            return ('-feed_created', '-id')
+        return ('-created', '-id')
+
+    def get_queryset(self):
+        """
+        Возвращает рецепты с предзагруженными связями.
+
+        Returns:
+            QuerySet: Набор запросов рецептов.
+        """
+        return Recipe.objects.with_related()
+
+    def get_validators(self, request, *args, **kwargs):
+        """
+        Возвращает валидаторы ответа по версиям данных рецептов.
+
+        Список и лента зависят от версии рецептов, детальный ответ —
+        от даты изменения рецепта. Кроме того, учитываются версии тегов,
+        ингредиентов, пользователей, уменьшенных копий изображений,
+        популярности при сортировке по ней и связей текущего пользователя.
+
+        Args:
+            request: Текущий запрос.
+            kwargs: Параметры адреса, для детального ответа — pk рецепта.
+
+        Returns:
+            tuple | None: ETag и дата изменения или None, если рецепт
+            не найден.
+        """
+        versions = [TAGS_VERSION, INGREDIENTS_VERSION, USERS_VERSION]
+        stamps = ()
+        if self.action == 'retrieve':
+            try:
+                updated_at = Recipe.objects.filter(
+                    pk=kwargs.get('pk')
+                ).values_list('updated_at', flat=True).first()
+            except (TypeError, ValueError):
+                return None
+            if updated_at is None:
+                return None
+            stamps = (timestamp(updated_at),)
+        else:
+            versions.extend((RECIPES_VERSION, RENDITIONS_VERSION))
+            if request.query_params.get('ordering') in RECIPE_ORDERINGS:
+                versions.append(POPULARITY_VERSION)
+        return make_validators(request, versions, stamps, per_user=True)
+
+    def get_count_versions(self):
+        """
+        Возвращает версии данных, от которых зависит количество рецептов
+        в списке.
+
+        Лента и фильтры по избранному и корзине зависят еще и от связей
+        текущего пользователя.
+        """
+        versions = [RECIPES_VERSION]
+        params = self.request.query_params
+        user = self.request.user
+        if user.is_authenticated and (
+            self.action == 'feed' or params.get('is_favorited')
+            or params.get('is_in_shopping_cart')
+        ):
+            versions.append(relations_version_name(user.pk))
+        return versions
+
+    @conditional
+    def list(self, request, *args, **kwargs):
+        """
+        Возвращает список рецептов с поддержкой условных запросов.
+
+        Args:
+            request: Текущий запрос.
+            args: Дополнительные аргументы.
+            kwargs: Дополнительные аргументы.
+
+        Returns:
+            Response: Ответ со страницей рецептов или 304.
+        """
+        return super().list(request, *args, **kwargs)
+
+    @conditional
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Возвращает рецепт с поддержкой условных запросов.
+
+        Args:
+            request: Текущий запрос.
+            args: Дополнительные аргументы.
+            kwargs: Параметры адреса, pk — идентификатор рецепта.
+
+        Returns:
+            Response: Ответ с рецептом или 304.
+        """
+        return super().retrieve(request, *args, **kwargs)
 
     def partial_update(self, request, *args, **kwargs):
         """
@@ -165,7 +460,67 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """
         serializer.save(author=self.request.user)
 
+    @action(['post'], detail=False, permission_classes=(IsAuthenticated,),
+            url_path='import')
+    def bulk_import(self, request):
+        """
+        Загружает рецепты текущего пользователя из тела запроса в NDJSON.
+
+        Каждая строка тела — рецепт в формате выгрузки, изображение
+        передается ссылкой на существующий файл или data URI.
+
+        Args:
+            request: Текущий запрос.
+
+        Returns:
+            StreamingHttpResponse: NDJSON с результатом по каждой строке.
+        """
+        return StreamingHttpResponse(
+            import_recipes(request.stream or (), author=request.user),
+            content_type='application/x-ndjson'
+        )
+
+    @action(detail=False, url_path='export')
+    def bulk_export(self, request):
+        """
+        Выгружает рецепты с учетом фильтров в формате NDJSON.
+
+        Args:
+            request: Текущий запрос.
+
+        Returns:
+            StreamingHttpResponse: NDJSON с рецептами.
+        """
+        queryset = self.filter_queryset(Recipe.objects.all())
+        response = StreamingHttpResponse(export_recipes(queryset),
+                                         content_type='application/x-ndjson')
+        response['Content-Disposition'] = 'inline; filename="recipes.ndjson"'
+        return response
+
+    @action(detail=False, permission_classes=(IsAuthenticated,))
+    @conditional
+    def feed(self, request):
+        """
+        Возвращает ленту рецептов авторов, на которых подписан пользователь.
+
+        Рецепты упорядочены от новых к старым, фильтры и пагинация
+        те же, что и у списка рецептов.
+
+        Args:
+            request: Текущий запрос.
+
+        Returns:
+            Response: Ответ с сериализованными рецептами ленты.
+        """
+        queryset = self.filter_queryset(
+            feed_queryset(self.get_queryset(), request.user)
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     @action(['post'], detail=True, permission_classes=(IsAuthenticated,))
+    @transaction.atomic
     def favorite(self, request, *args, **kwargs):
         """
         Добавляет рецепт в избранное.
@@ -190,6 +545,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @favorite.mapping.delete
+    @transaction.atomic
     def unfavorite(self, request, *args, **kwargs):
         """
         Удаляет рецепт из избранного.
@@ -217,58 +573,105 @@ class RecipeViewSet(viewsets.ModelViewSet):
         serializer = ShortRecipeSerializer(recipe)
         return Response(serializer.data)
 
-    @action(detail=False, permission_classes=(IsAuthenticated,))
+    @action(detail=False, permission_classes=(IsAuthenticated,),
+            renderer_classes=SHOPPING_LIST_RENDERERS)
     def download_shopping_cart(self, request):
         """
-        Скачивает список ингредиентов из корзины покупок в виде PDF.
+        Скачивает список ингредиентов из корзины покупок.
+
+        Формат выбирается параметром format (pdf, txt, csv, json) или
+        заголовком Accept, по умолчанию отдается PDF. Готовые документы
+        кешируются до следующего изменения корзины.
+
+        С параметром mode=async или заголовком Prefer: respond-async
+        документ формируется в фоне, а в ответ возвращается задача,
+        состояние которой можно запрашивать.
 
         Args:
             request: Текущий запрос.
 
         Returns:
-            HttpResponse: Ответ с PDF-файлом.
-        """
-        queryset = ShoppingCart.objects.filter(user=request.user)
-        result = defaultdict(dict)
-        for item in queryset:
-            recipe = item.recipe
-            ingredients_amounts = (
-                recipe.amount_ingredients.all().select_related('ingredient')
+            StreamingHttpResponse: Ответ с файлом списка покупок.
+        """
+        renderer = request.accepted_renderer
+        if (request.query_params.get('mode') == 'async'
+                or 'respond-async' in request.headers.get('Prefer', '')):
+            job = enqueue_shopping_list(request.user, renderer.format)
+            serializer = ShoppingListJobSerializer(
+                job, context={'request': request}
             )
-            for ingredient_amount in ingredients_amounts:
-                ingredient = ingredient_amount.ingredient.name
-                amount = ingredient_amount.amount
-                unit = ingredient_amount.ingredient.measurement_unit
-                if ingredient in ingredients_amounts:
-                    if unit in ingredients_amounts[ingredient]:
-                        result[ingredient][unit] += amount
-                    else:
-                        result[ingredient][unit] = amount
-                else:
-                    result[ingredient] = {unit: amount}
-        buffer = BytesIO()
-        pdfmetrics.registerFont(
-            TTFont('DejaVuSans', 'fonts/DejaVuSans.ttf', 'UTF-8'))
-        c = canvas.Canvas(buffer, pagesize=letter)
-        y = 750
-        x_offset = 50
-        c.setFont('DejaVuSans', 12,)
-        c.drawString(x_offset, y, 'Список ингредиентов в корзине:')
-        for ingredient, quantities in result.items():
-            y -= 20
-            c.drawString(x_offset, y, f'{ingredient}:')
-            for unit, amount in quantities.items():
-                y -= 15
-                c.drawString(x_offset + 20, y, f'- {amount} {unit}')
-        c.save()
-        pdf = buffer.getvalue()
-        buffer.close()
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = 'inline; filename="ingredients.pdf"'
-        response.write(pdf)
+            location = reverse('api:recipe-shopping-list-job',
+                               kwargs={'job_id': job.pk})
+            return Response(serializer.data, status=status.HTTP_202_ACCEPTED,
+                            headers={'Location': location})
+        document, hit = get_shopping_list_document(
+            request.user, renderer,
+            lambda: renderer.stream(get_shopping_list(request.user))
+        )
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f'{content_type}; charset={renderer.charset}'
+        response = StreamingHttpResponse(document, content_type=content_type)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        response['Content-Disposition'] = (
+            f'inline; filename="ingredients.{renderer.format}"'
+        )
         return response
 
+    @action(detail=False, permission_classes=(IsAuthenticated,),
+            url_path=r'download_shopping_cart/jobs/(?P<job_id>\d+)',
+            url_name='shopping-list-job')
+    def shopping_list_job(self, request, job_id):
+        """
+        Возвращает состояние фоновой задачи формирования списка покупок.
+
+        Args:
+            request: Текущий запрос.
+            job_id: Идентификатор задачи.
+
+        Returns:
+            Response: Ответ с данными задачи, 202 пока задача не завершена.
+
+        Raises:
+            exceptions.NotFound: Если задача не найдена.
+        """
+        try:
+            job = ShoppingListJob.objects.get(pk=job_id, user=request.user)
+        except ShoppingListJob.DoesNotExist:
+            raise exceptions.NotFound
+        serializer = ShoppingListJobSerializer(job, context={'request': request})
+        if job.status in (ShoppingListJob.PENDING, ShoppingListJob.RUNNING):
+            return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+        return Response(serializer.data)
+
+    @action(detail=False, permission_classes=(IsAuthenticated,),
+            url_path=r'download_shopping_cart/jobs/(?P<job_id>\d+)/download',
+            url_name='shopping-list-job-download')
+    def download_shopping_list_job(self, request, job_id):
+        """
+        Скачивает документ, сформированный фоновой задачей.
+
+        Args:
+            request: Текущий запрос.
+            job_id: Идентификатор задачи.
+
+        Returns:
+            FileResponse: Ответ с файлом списка покупок.
+
+        Raises:
+            exceptions.NotFound: Если готовая задача не найдена.
+        """
+        try:
+            job = ShoppingListJob.objects.get(pk=job_id, user=request.user,
+                                              status=ShoppingListJob.DONE)
+        except ShoppingListJob.DoesNotExist:
+            raise exceptions.NotFound
+        return FileResponse(job.file.open('rb'),
+                            content_type=RENDERERS[job.format].media_type,
+                            filename=f'ingredients.{job.format}')
+
     @action(['post'], detail=True, permission_classes=(IsAuthenticated,))
+    @transaction.atomic
     def shopping_cart(self, request, *args, **kwargs):
         """
         Добавляет рецепт в корзину покупок.
@@ -293,6 +696,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @shopping_cart.mapping.delete
+    @transaction.atomic
     def remove_from_shopping_cart(self, request, *args, **kwargs):
         """
         Удаляет рецепт из корзины покупок.
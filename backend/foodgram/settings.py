@@ -100,6 +100,19 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -140,6 +153,11 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static/')
 MEDIA_URL = 'media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media/')
 
+# Файлы, которые отдаются только через API после проверки прав,
+# хранятся вне MEDIA_ROOT и не раздаются веб-сервером.
+PRIVATE_MEDIA_ROOT = os.getenv('PRIVATE_MEDIA_ROOT',
+                               os.path.join(BASE_DIR, 'private/'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -172,3 +190,22 @@ DJOSER = {
         'user_list': ['rest_framework.permissions.AllowAny'],
     },
 }
+
+SHOPPING_LIST_CACHE_TIMEOUT = 60 * 60
+SHOPPING_LIST_JOB_TTL = 24 * 60 * 60
+SHOPPING_LIST_JOB_TIMEOUT = 10 * 60
+
+RECIPE_IMAGE_MAX_SIZE = 10 * 1024 * 1024
+
+IMAGE_RENDITION_WORKERS = 2
+
+PAGINATION_COUNT_CACHE_TIMEOUT = 60
+PAGINATION_COUNT_ESTIMATE_MIN = 10000
+
+RECIPE_INGREDIENT_SEARCH_LIMIT = 1000
+
+FEED_FANOUT_LIMIT = 10000
+
+POPULARITY_FAVORITE_WEIGHT = 2
+POPULARITY_CART_WEIGHT = 1
+TRENDING_HALF_LIFE = 7 * 24 * 60 * 60
@@ -1,7 +1,7 @@
 from django.contrib import admin
 
 from .models import (Tag, Ingredient, Recipe, AmountIngredient, ShoppingCart,
-                     Favorite)
+                     Favorite, ShoppingListJob, FeedEntry)
 
 
 @admin.register(Tag)
@@ -27,7 +27,7 @@ class RecipeAdmin(admin.ModelAdmin):
     """
     Административная панель для управления рецептами.
     """
-    list_display = ('name', 'author', 'get_tags')
+    list_display = ('name', 'author', 'get_tags', 'favorites_count')
     list_filter = ('name', 'author', 'tags')
     search_fields = ('name', 'author')
 
@@ -98,3 +98,21 @@ class FavoriteAdmin(admin.ModelAdmin):
         Возвращает название рецепта.
         """
         return obj.recipe.name
+
+
+@admin.register(ShoppingListJob)
+class ShoppingListJobAdmin(admin.ModelAdmin):
+    """
+    Административная панель для просмотра задач формирования списков покупок.
+    """
+    list_display = ('user', 'format', 'status', 'created', 'updated')
+    list_filter = ('status', 'format')
+
+
+@admin.register(FeedEntry)
+class FeedEntryAdmin(admin.ModelAdmin):
+    """
+    Административная панель для просмотра лент подписок.
+    """
+    list_display = ('user', 'recipe', 'author', 'created')
+    list_select_related = ('user', 'recipe', 'author')
@@ -0,0 +1,43 @@
+# Generated by Django 4.2 on 2026-10-17 04:32
+
+from django.db import migrations, models
+from django.db.models import F
+
+FAVORITE_WEIGHT = 2
+CART_WEIGHT = 1
+
+
+def fill_popularity(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    popularity = (F('favorites_count') * FAVORITE_WEIGHT
+                  + F('carts_count') * CART_WEIGHT)
+    Recipe.objects.update(popularity=popularity, trend_score=popularity)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_feedentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='popularity',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Популярность'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='trend_score',
+            field=models.FloatField(default=0, editable=False, verbose_name='Рейтинг трендов'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-popularity', '-id'], name='recipe_popularity'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-trend_score', '-id'], name='recipe_trend_score'),
+        ),
+        migrations.RunPython(fill_popularity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-17 04:50
+
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+import recipes.models
+
+
+def remove_public_files(apps, schema_editor):
+    ShoppingListJob = apps.get_model('recipes', 'ShoppingListJob')
+    jobs = ShoppingListJob.objects.exclude(file='')
+    for name in jobs.values_list('file', flat=True).iterator():
+        default_storage.delete(name)
+    jobs.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_recipe_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='shoppinglistjob',
+            name='file',
+            field=models.FileField(blank=True, storage=recipes.models.private_storage, upload_to=recipes.models.shopping_list_path, verbose_name='Файл'),
+        ),
+        migrations.RunPython(remove_public_files, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2 on 2026-10-17 04:52
+
+import os
+
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+# Последняя создаваемая копия изображения на момент миграции.
+LAST_RENDITION = 'thumb'
+RENDITION_EXTENSION = 'webp'
+
+
+def has_renditions(image_name):
+    directory, file_name = os.path.split(image_name)
+    stem = os.path.splitext(file_name)[0]
+    return default_storage.exists(os.path.join(
+        directory, 'renditions',
+        f'{stem}_{LAST_RENDITION}.{RENDITION_EXTENSION}'
+    ))
+
+
+def fill_renditions_ready(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    ready = [pk for pk, image in Recipe.objects.exclude(image='')
+             .values_list('pk', 'image').iterator()
+             if has_renditions(image)]
+    for start in range(0, len(ready), 1000):
+        Recipe.objects.filter(pk__in=ready[start:start + 1000]).update(
+            renditions_ready=True
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_shoppinglistjob_private_file'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='renditions_ready',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Копии изображения созданы'),
+        ),
+        migrations.RunPython(fill_renditions_ready,
+                             migrations.RunPython.noop),
+    ]
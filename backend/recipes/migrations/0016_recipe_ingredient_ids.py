@@ -0,0 +1,45 @@
+# Generated by Django 4.2 on 2026-10-17 06:10
+
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db import migrations, models
+from django.db.models import OuterRef
+
+import recipes.models
+
+
+def create_ingredient_ids_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Recipe = apps.get_model('recipes', 'Recipe')
+    AmountIngredient = apps.get_model('recipes', 'AmountIngredient')
+    Recipe.objects.update(ingredient_ids=ArraySubquery(
+        AmountIngredient.objects.filter(recipe=OuterRef('pk'))
+        .order_by('ingredient_id').values('ingredient_id')
+    ))
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS recipes_recipe_ingredient_ids '
+        'ON recipes_recipe USING gin (ingredient_ids)'
+    )
+
+
+def drop_ingredient_ids_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS recipes_recipe_ingredient_ids')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0015_recipe_renditions_ready'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='ingredient_ids',
+            field=recipes.models.PostgresArrayField(base_field=models.IntegerField(), editable=False, null=True, size=None),
+        ),
+        migrations.RunPython(create_ingredient_ids_index,
+                             drop_ingredient_ids_index),
+    ]
@@ -1,11 +1,50 @@
+import os
+import uuid
+
+from django.conf import settings
 from django.db import models
 
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.search import SearchVectorField
+from django.core.files.storage import FileSystemStorage
 from django.core.validators import MinValueValidator
 
 User = get_user_model()
 
 
+class PostgresArrayField(ArrayField):
+    """
+    Массив, который заполняется только в PostgreSQL.
+
+    В остальных базах данных столбец всегда пуст, поэтому приведение
+    значения к типу массива в запросе не добавляется.
+    """
+
+    def get_placeholder(self, value, compiler, connection):
+        if connection.vendor != 'postgresql':
+            return '%s'
+        return super().get_placeholder(value, compiler, connection)
+
+
+def private_storage():
+    """
+    Возвращает хранилище закрытых файлов вне MEDIA_ROOT.
+
+    Файлы из него не раздаются веб-сервером и отдаются только
+    через API после проверки владельца.
+    """
+    return FileSystemStorage(location=settings.PRIVATE_MEDIA_ROOT)
+
+
+def shopping_list_path(instance, filename):
+    """
+    Возвращает путь файла списка покупок со случайным именем.
+    """
+    extension = os.path.splitext(filename)[1]
+    return f'shopping_lists/{uuid.uuid4().hex}{extension}'
+
+
 class Tag(models.Model):
     """
     Модель тега для рецептов.
@@ -48,6 +87,27 @@ class Ingredient(models.Model):
         ),)
 
 
+class RecipeQuerySet(models.QuerySet):
+    """
+    Набор запросов для рецептов.
+    """
+
+    def with_related(self):
+        """
+        Подгружает связанные объекты рецептов.
+
+        Вся страница рецептов загружается фиксированным числом запросов:
+        автор подтягивается через select_related, а теги и ингредиенты
+        через prefetch_related. Признаки избранного, корзины и подписки
+        берутся из связей пользователя, загружаемых один раз на запрос.
+
+        Returns:
+            RecipeQuerySet: Набор запросов со связанными объектами.
+        """
+        return self.select_related('author').prefetch_related('tags',
+                                                              'ingredients')
+
+
 class Recipe(models.Model):
     """
     Модель рецепта.
@@ -60,6 +120,21 @@ class Recipe(models.Model):
         image (ImageField): Изображение рецепта.
         text (TextField): Описание рецепта.
         cooking_time (PositiveSmallIntegerField): Время приготовления в минутах.
+        favorites_count (PositiveIntegerField): Сколько раз рецепт добавлен
+            в избранное.
+        carts_count (PositiveIntegerField): Сколько раз рецепт добавлен
+            в корзину покупок.
+        popularity (PositiveIntegerField): Взвешенная сумма добавлений
+            в избранное и в корзины.
+        trend_score (FloatField): Популярность с затуханием во времени.
+        created (DateTimeField): Дата публикации рецепта.
+        updated_at (DateTimeField): Дата последнего изменения рецепта.
+        renditions_ready (BooleanField): Созданы ли уменьшенные копии
+            изображения.
+        search_vector (SearchVectorField): Поисковый вектор названия
+            и описания, заполняется только в PostgreSQL.
+        ingredient_ids (PostgresArrayField): Идентификаторы ингредиентов рецепта
+            для поиска по ингредиентам, заполняется только в PostgreSQL.
     """
     tags = models.ManyToManyField(Tag, related_name='recipes',
                                   verbose_name='Тэги')
@@ -80,10 +155,37 @@ class Recipe(models.Model):
             1, message='Минимальное время приготовления 1 минута'),
         )
     )
+    favorites_count = models.PositiveIntegerField('В избранном', default=0,
+                                                  editable=False)
+    carts_count = models.PositiveIntegerField('В корзинах', default=0,
+                                              editable=False)
+    popularity = models.PositiveIntegerField('Популярность', default=0,
+                                             editable=False)
+    trend_score = models.FloatField('Рейтинг трендов', default=0,
+                                    editable=False)
+    created = models.DateTimeField('Дата публикации', auto_now_add=True)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+    renditions_ready = models.BooleanField('Копии изображения созданы',
+                                           default=False, editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+    ingredient_ids = PostgresArrayField(models.IntegerField(), null=True,
+                                        editable=False)
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        ordering = ('-created', '-id')
+        indexes = (
+            models.Index(fields=('-created', '-id'), name='recipe_created_id'),
+            models.Index(fields=('author', '-created', '-id'),
+                         name='recipe_author_created'),
+            models.Index(fields=('-popularity', '-id'),
+                         name='recipe_popularity'),
+            models.Index(fields=('-trend_score', '-id'),
+                         name='recipe_trend_score'),
+        )
 
 
 class AmountIngredient(models.Model):
@@ -120,6 +222,7 @@ class ShoppingCart(models.Model):
     Attributes:
         recipe (ForeignKey): Рецепт в корзине.
         user (ForeignKey): Пользователь, владеющий корзиной.
+        created (DateTimeField): Дата добавления рецепта в корзину.
     """
     recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE,
                                related_name='in_shopping_carts',
@@ -127,6 +230,7 @@ class ShoppingCart(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE,
                              related_name='shopping_carts',
                              verbose_name='Пользователь')
+    created = models.DateTimeField('Дата добавления', auto_now_add=True)
 
     class Meta:
         verbose_name = 'Корзина'
@@ -135,6 +239,8 @@ class ShoppingCart(models.Model):
             fields=('recipe', 'user'),
             name='unique_shopping_cart'
         ),)
+        indexes = (models.Index(fields=('user', 'recipe'),
+                                name='shopping_cart_user_recipe'),)
 
 
 class Favorite(models.Model):
@@ -144,6 +250,7 @@ class Favorite(models.Model):
     Attributes:
         recipe (ForeignKey): Избранный рецепт.
         user (ForeignKey): Пользователь, добавивший рецепт в избранное.
+        created (DateTimeField): Дата добавления рецепта в избранное.
     """
     recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE,
                                related_name='in_favorites',
@@ -151,6 +258,7 @@ class Favorite(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE,
                              related_name='favorites',
                              verbose_name='Пользователь')
+    created = models.DateTimeField('Дата добавления', auto_now_add=True)
 
     class Meta:
         verbose_name = 'Избранное'
@@ -159,3 +267,86 @@ class Favorite(models.Model):
             fields=('recipe', 'user'),
             name='unique_favorite'
         ),)
+        indexes = (models.Index(fields=('user', 'recipe'),
+                                name='favorite_user_recipe'),)
+
+
+class ShoppingListJob(models.Model):
+    """
+    Модель фоновой задачи формирования списка покупок.
+
+    Attributes:
+        user (ForeignKey): Пользователь, запросивший список.
+        format (CharField): Формат документа.
+        status (CharField): Состояние задачи.
+        file (FileField): Готовый документ в закрытом хранилище.
+        error (TextField): Текст ошибки, если задача завершилась неудачно.
+        created (DateTimeField): Время постановки задачи.
+        updated (DateTimeField): Время последнего изменения задачи.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name='shopping_list_jobs',
+                             verbose_name='Пользователь')
+    format = models.CharField('Формат', max_length=10)
+    status = models.CharField('Статус', max_length=10, choices=STATUSES,
+                              default=PENDING)
+    file = models.FileField('Файл', upload_to=shopping_list_path,
+                            storage=private_storage, blank=True)
+    error = models.TextField('Ошибка', blank=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    updated = models.DateTimeField('Обновлена', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Задача списка покупок'
+        verbose_name_plural = 'Задачи списков покупок'
+        indexes = (models.Index(fields=('status', 'created'),
+                                name='shopping_list_job_queue'),)
+
+
+class FeedEntry(models.Model):
+    """
+    Модель записи ленты подписок.
+
+    Запись создается для каждого подписчика при публикации рецепта,
+    поэтому лента пользователя читается одним диапазоном индекса.
+
+    Attributes:
+        user (ForeignKey): Владелец ленты.
+        recipe (ForeignKey): Рецепт в ленте.
+        author (ForeignKey): Автор рецепта.
+        created (DateTimeField): Дата публикации рецепта.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name='feed_entries',
+                             verbose_name='Пользователь')
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE,
+                               related_name='feed_entries',
+                               verbose_name='Рецепт')
+    author = models.ForeignKey(User, on_delete=models.CASCADE,
+                               related_name='+', verbose_name='Автор')
+    created = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = (models.constraints.UniqueConstraint(
+            fields=('user', 'recipe'),
+            name='unique_feed_entry'
+        ),)
+        indexes = (
+            models.Index(fields=('user', '-created', '-recipe'),
+                         name='feed_entry_user_created'),
+            models.Index(fields=('user', 'author'),
+                         name='feed_entry_user_author'),
+        )
@@ -0,0 +1,27 @@
+# Generated by Django 4.2 on 2026-10-17 07:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_feed_on_read(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    User.objects.filter(
+        followers_count__gte=settings.FEED_FANOUT_LIMIT
+    ).update(feed_on_read=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_subscription_user_author_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='feed_on_read',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Лента при чтении'),
+        ),
+        migrations.RunPython(fill_feed_on_read, migrations.RunPython.noop),
+    ]
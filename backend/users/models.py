@@ -5,8 +5,21 @@ from django.contrib.auth.models import AbstractUser
 class User(AbstractUser):
     """
     Модель пользователя, основанная на стандартной модели AbstractUser.
+
+    Attributes:
+        recipes_count (PositiveIntegerField): Количество рецептов автора.
+        followers_count (PositiveIntegerField): Количество подписчиков.
+        feed_on_read (BooleanField): Подмешиваются ли рецепты автора
+            в ленты подписчиков при чтении. Устанавливается, когда у автора
+            становится не меньше FEED_FANOUT_LIMIT подписчиков, и больше
+            не сбрасывается: записей ленты для его рецептов может не быть.
     """
-    pass
+    recipes_count = models.PositiveIntegerField('Количество рецептов',
+                                                default=0, editable=False)
+    followers_count = models.PositiveIntegerField('Количество подписчиков',
+                                                  default=0, editable=False)
+    feed_on_read = models.BooleanField('Лента при чтении', default=False,
+                                       editable=False)
 
 
 class Subscription(models.Model):
@@ -31,3 +44,8 @@ class Subscription(models.Model):
             fields=('author', 'user'),
             name='unique_subscription'
         ),)
+        indexes = (
+            models.Index(fields=('user', '-id'), name='subscription_user_id'),
+            models.Index(fields=('user', 'author'),
+                         name='subscription_user_author'),
+        )